@@ -7,7 +7,10 @@ This script implements a RAG system for code-related queries using LlamaIndex an
 import os
 import sys
 import argparse
+import functools
+import hashlib
 import json
+import time
 from typing import List, Dict, Any, Optional, Tuple, Set
 
 from dotenv import load_dotenv
@@ -30,6 +33,11 @@ except ImportError:
     patch_litellm = None
 from qdrant_client import QdrantClient
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
 # Load environment variables
 load_dotenv()
 
@@ -45,6 +53,50 @@ QDRANT_URL = f"http://{QDRANT_HOST}:{QDRANT_PORT}"
 # Collection names
 CODE_COLLECTION = "code_fragments"
 
+# Redis cache for generated responses; opt-in, as it returns earlier answers to
+# repeated prompts (set GENERATION_CACHE_TTL to a number of seconds to enable)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "0"))
+# Seconds to wait before trying to reach Redis again after a failed connection
+GENERATION_CACHE_RETRY = 30.0
+
+_generation_cache = None
+_generation_cache_retry_at = 0.0
+
+def _get_generation_cache():
+    """Return a Redis client for the generation cache, or None if it is disabled or unreachable."""
+    global _generation_cache, _generation_cache_retry_at
+    if _generation_cache is not None:
+        return _generation_cache
+    if redis is None or GENERATION_CACHE_TTL <= 0:
+        return None
+    if time.monotonic() < _generation_cache_retry_at:
+        return None
+    try:
+        client = redis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
+            db=REDIS_DB,
+            socket_connect_timeout=0.2,
+            socket_timeout=0.5,
+            retry_on_timeout=False
+        )
+        client.ping()
+        _generation_cache = client
+    except Exception as e:
+        print(f"Warning: Generation cache unavailable, retrying in {GENERATION_CACHE_RETRY:.0f}s: {e}")
+        _generation_cache_retry_at = time.monotonic() + GENERATION_CACHE_RETRY
+    return _generation_cache
+
+@functools.lru_cache(maxsize=4)
+def _load_embed_model(model_name: str) -> HuggingFaceEmbedding:
+    """Load an embedding model once per process; later CodeRAG instances share it."""
+    return HuggingFaceEmbedding(model_name=model_name)
+
 class CodeRAG:
     """RAG system for code-related queries."""
     
@@ -88,7 +140,7 @@ class CodeRAG:
         
         # Load embedding model
         print(f"Loading embedding model: {embedding_model_name}")
-        self.embed_model = HuggingFaceEmbedding(model_name=embedding_model_name)
+        self.embed_model = _load_embed_model(embedding_model_name)
         
         # Initialize LLM client
         print(f"Initializing LLM client with model: {llm_model_name}")
@@ -118,9 +170,9 @@ class CodeRAG:
         )
         
         # Initialize Qdrant vector store
-        qdrant_client = QdrantClient(url=QDRANT_URL)
+        self.qdrant_client = QdrantClient(url=QDRANT_URL)
         self.vector_store = QdrantVectorStore(
-            client=qdrant_client,
+            client=self.qdrant_client,
             collection_name=CODE_COLLECTION,
         )
         
@@ -162,6 +214,36 @@ class CodeRAG:
         
         return nodes[0].id_ if nodes else ""
     
+    def add_code_batch(self, items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add several pieces of code to the index in one insert.
+        
+        All nodes are embedded in batches and written to Qdrant together,
+        rather than one embedding pass and upsert per piece of code.
+        
+        Args:
+            items: Dicts with a "code" key and an optional "metadata" dict
+            
+        Returns:
+            IDs of the added documents, in the order of items
+        """
+        docs = [
+            Document(text=item["code"], metadata=item.get("metadata") or {})
+            for item in items
+        ]
+        
+        # Split into nodes
+        nodes = self.node_parser.get_nodes_from_documents(docs)
+        
+        # Add to index
+        self.index.insert_nodes(nodes)
+        
+        # Report the first node of each document, as add_code_to_index does
+        first_ids = {}
+        for node in nodes:
+            first_ids.setdefault(node.ref_doc_id, node.id_)
+        return [first_ids.get(doc.doc_id, "") for doc in docs]
+    
     def retrieve_relevant_code(
         self,
         query: str,
@@ -319,6 +401,21 @@ Based on the following code context:
                 ]
             }
             
+            # Identical prompts for the same model reuse the cached response
+            cache = _get_generation_cache()
+            cache_key = None
+            if cache is not None:
+                prompt_hash = hashlib.blake2b(
+                    f"{self.llm_model_name}\0{combined_prompt}".encode("utf-8"), digest_size=16
+                ).hexdigest()
+                cache_key = f"rag:gen:{project_id or '-'}:{prompt_hash}"
+                try:
+                    cached = cache.get(cache_key)
+                    if cached is not None:
+                        return cached.decode("utf-8")
+                except Exception as e:
+                    print(f"Warning: Generation cache lookup failed: {e}")
+            
             print(f"Sending request to LiteLLM API with model: {self.llm_model_name}")
             response = requests.post(
                 f"{LITELLM_URL}/v1/chat/completions",
@@ -328,7 +425,13 @@ Based on the following code context:
             
             if response.status_code == 200:
                 result = response.json()
-                return result["choices"][0]["message"]["content"]
+                content = result["choices"][0]["message"]["content"]
+                if cache_key is not None:
+                    try:
+                        cache.setex(cache_key, GENERATION_CACHE_TTL, content)
+                    except Exception as e:
+                        print(f"Warning: Generation cache write failed: {e}")
+                return content
             else:
                 error_message = f"LiteLLM API error: Status code {response.status_code}. Details: {response.text}"
                 print(error_message)
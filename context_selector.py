@@ -92,7 +92,10 @@ if REDIS_AVAILABLE and litellm_settings.get('cache', False):
             port=REDIS_PORT,
             password=REDIS_PASSWORD if REDIS_PASSWORD else None,
             db=REDIS_DB,
-            socket_timeout=5
+            # Fail fast when Redis is unreachable; the cache is optional
+            socket_connect_timeout=0.2,
+            socket_timeout=0.5,
+            retry_on_timeout=False
         )
         # Test connection
         redis_client.ping()
@@ -1216,6 +1216,42 @@ class DevAgentCLI:
             print("No history found")
             print("Check if you have an active session or try loading one first.")
     
+    # Command handlers, keyed by command name
+    _COMMAND_HANDLERS = {
+        "status": handle_status,
+        "search": handle_search,
+        "generate": handle_generate,
+        "add": handle_add,
+        "analyze": handle_analyze,
+        "init": handle_init,
+    }
+    
+    # Handlers of commands with subcommands, keyed by command and then subcommand name
+    _SUBCOMMAND_HANDLERS = {
+        "project": {
+            "list": handle_project_list,
+            "create": handle_project_create,
+            "get": handle_project_get,
+            "update": handle_project_update,
+            "delete": handle_project_delete,
+            "add-file": handle_project_add_file,
+            "export": handle_project_export,
+            "import": handle_project_import,
+        },
+        "session": {
+            "list": handle_session_list,
+            "create": handle_session_create,
+            "load": handle_session_load,
+            "info": handle_session_info,
+            "close": handle_session_close,
+            "reset": handle_session_reset,
+            "export": handle_session_export,
+            "import": handle_session_import,
+            "delete": handle_session_delete,
+            "history": handle_session_history,
+        },
+    }
+    
     def run(self, args: List[str] = None) -> None:
         """Run the CLI with the given arguments."""
         # Parse arguments 
@@ -1239,64 +1275,20 @@ class DevAgentCLI:
         
         # Execute appropriate command
         try:
-            if args_namespace.command == "status":
-                self.handle_status(args_namespace)
-            elif args_namespace.command == "search":
-                self.handle_search(args_namespace)
-            elif args_namespace.command == "generate":
-                self.handle_generate(args_namespace)
-            elif args_namespace.command == "add":
-                self.handle_add(args_namespace)
-            elif args_namespace.command == "analyze":
-                self.handle_analyze(args_namespace)
-            elif args_namespace.command == "project":
-                if args_namespace.project_command == "list":
-                    self.handle_project_list(args_namespace)
-                elif args_namespace.project_command == "create":
-                    self.handle_project_create(args_namespace)
-                elif args_namespace.project_command == "get":
-                    self.handle_project_get(args_namespace)
-                elif args_namespace.project_command == "update":
-                    self.handle_project_update(args_namespace)
-                elif args_namespace.project_command == "delete":
-                    self.handle_project_delete(args_namespace)
-                elif args_namespace.project_command == "add-file":
-                    self.handle_project_add_file(args_namespace)
-                elif args_namespace.project_command == "export":
-                    self.handle_project_export(args_namespace)
-                elif args_namespace.project_command == "import":
-                    self.handle_project_import(args_namespace)
-                else:
-                    print("Error: No project subcommand specified")
+            command = args_namespace.command
+            if command in self._SUBCOMMAND_HANDLERS:
+                subcommand = getattr(args_namespace, f"{command}_command", None)
+                handler = self._SUBCOMMAND_HANDLERS[command].get(subcommand)
+                if handler is None:
+                    print(f"Error: No {command} subcommand specified")
                     sys.exit(1)
-            elif args_namespace.command == "session":
-                if args_namespace.session_command == "list":
-                    self.handle_session_list(args_namespace)
-                elif args_namespace.session_command == "create":
-                    self.handle_session_create(args_namespace)
-                elif args_namespace.session_command == "load":
-                    self.handle_session_load(args_namespace)
-                elif args_namespace.session_command == "info":
-                    self.handle_session_info(args_namespace)
-                elif args_namespace.session_command == "close":
-                    self.handle_session_close(args_namespace)
-                elif args_namespace.session_command == "reset":
-                    self.handle_session_reset(args_namespace)
-                elif args_namespace.session_command == "export":
-                    self.handle_session_export(args_namespace)
-                elif args_namespace.session_command == "import":
-                    self.handle_session_import(args_namespace)
-                elif args_namespace.session_command == "delete":
-                    self.handle_session_delete(args_namespace)
-                elif args_namespace.session_command == "history":
-                    self.handle_session_history(args_namespace)
-                else:
-                    print("Error: No session subcommand specified")
-                    sys.exit(1)
-            elif args_namespace.command == "init":
-                self.handle_init(args_namespace)
+                handler(self, args_namespace)
             else:
-                self.parser.print_help()
+                handler = self._COMMAND_HANDLERS.get(command)
+                if handler is None:
+                    self.parser.print_help()
+                else:
+                    handler(self, args_namespace)
         except Exception as e:
             # Record error in session history if we have an active session
             if active_session:
@@ -8,12 +8,27 @@ import os
 import sys
 import json
 import argparse
+import asyncio
+import functools
+import gzip
+import socket
+import stat
+import tempfile
+import threading
+import time
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Hashable, Union, Callable, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = os.getenv("QDRANT_PORT", "6333")
@@ -23,18 +38,211 @@ QDRANT_URL = f"http://{QDRANT_HOST}:{QDRANT_PORT}"
 CODE_COLLECTION = "code_fragments"
 PROJECT_COLLECTION = "project_metadata"
 
-def check_qdrant_health() -> bool:
-    """Check if Qdrant is running and healthy."""
+# Projects with fewer matching points than this are deleted by ID instead of by filter
+SMALL_DELETE_THRESHOLD = 4096
+SCROLL_PAGE_SIZE = 1024
+
+# Unix socket used by the `serve` daemon and the qdrant_helperc client. It lives in
+# a per-user directory: the daemon is unauthenticated, so only its owner may connect
+DAEMON_DIR = os.getenv("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"qdrant_helper-{os.getuid()}")
+DAEMON_SOCKET = os.getenv("QDRANT_HELPER_SOCKET") or os.path.join(DAEMON_DIR, "qdrant_helper.sock")
+# Longest request line the daemon accepts; batches of embeddings easily exceed asyncio's 64 KiB default
+DAEMON_MAX_REQUEST = int(os.getenv("QDRANT_HELPER_MAX_REQUEST", str(64 * 1024 * 1024)))
+
+# Request bodies larger than this are gzip-compressed (0 disables compression)
+GZIP_MIN_BYTES = int(os.getenv("QDRANT_GZIP_MIN_BYTES", "4096"))
+
+# Health check caching and circuit breaker settings
+HEALTH_CHECK_TTL = 5.0  # Seconds a successful health check stays valid
+BREAKER_FAIL_MAX = 5  # Consecutive failures before the circuit opens
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds to fail fast before retrying Qdrant
+
+# (connect, read) timeouts in seconds per kind of operation
+_TIMEOUTS = {
+    "health": (0.5, 1),
+    "admin": (1, 10),
+    "search": (1, 5),
+    "upsert": (1, 30),
+    "delete": (1, 60),
+}
+
+# Shared HTTP session so connections to Qdrant are reused across calls.
+# Transient connection errors and 429/502/503/504 responses are retried with backoff.
+_RETRY = Retry(
+    total=3,
+    connect=3,
+    read=1,
+    backoff_factor=0.2,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "POST", "PUT"]),
+    raise_on_status=False,
+)
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY))
+# Health probes should report failure immediately rather than retry
+_PROBE_SESSION = requests.Session()
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Minimal circuit breaker that fails fast while Qdrant is unreachable.
+    
+    Thread-safe: calls made from asyncio.to_thread workers share one breaker.
+    """
+    
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Return True if a call may be attempted."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # Half-open after the cool-down: let this one trial call through and keep
+            # rejecting the others until it reports; a failure re-opens the circuit
+            self.opened_at = time.monotonic()
+            return True
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.fail_max:
+                self.opened_at = time.monotonic()
+
+_BREAKER = CircuitBreaker()
+_last_healthy = float("-inf")
+
+# Collections known to exist with their project_id index, so create_collections
+# skips them for the rest of the process
+_ready_collections = set()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _as_vector(embedding: Union[List[float], np.ndarray]) -> Union[List[float], np.ndarray]:
+    """
+    Prepare an embedding for serialization.
+    
+    Numpy arrays are kept as contiguous float32 arrays when orjson can
+    serialize them directly, and only converted to lists otherwise.
+    """
+    if isinstance(embedding, np.ndarray):
+        if orjson is not None:
+            return np.ascontiguousarray(embedding, dtype=np.float32)
+        return embedding.tolist()
+    return embedding
+
+def _dumps(obj: Any) -> bytes:
+    """Encode a request body as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj).encode("utf-8")
+
+def _send_json(method: str, url: str, obj: Any, **kwargs) -> requests.Response:
+    """
+    Send a JSON request body to Qdrant, gzip-compressing it when it is large.
+    
+    Responses are compressed too, since requests advertises Accept-Encoding: gzip.
+    """
+    body = _dumps(obj)
+    headers = _JSON_HEADERS
+    if GZIP_MIN_BYTES and len(body) > GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=1)
+        headers = {**_JSON_HEADERS, "Content-Encoding": "gzip"}
+    return _request(method, url, data=body, headers=headers, **kwargs)
+
+def _loads(content: bytes) -> Any:
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _request(
+    method: str,
+    url: str,
+    session: Optional[requests.Session] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Send an HTTP request to Qdrant through the shared session and circuit breaker.
+    
+    Raises:
+        CircuitOpenError: If the circuit is open and the call was not attempted
+        requests.exceptions.RequestException: If the request itself failed
+    """
+    if not _BREAKER.allow():
+        raise CircuitOpenError(f"Circuit open, skipping {method} {url}")
+    kwargs.setdefault("timeout", _TIMEOUTS["admin"])
     try:
-        response = requests.get(f"{QDRANT_URL}/readyz")
-        return response.status_code == 200
+        response = (session or _SESSION).request(method, url, **kwargs)
     except requests.exceptions.RequestException:
-        return False
+        _BREAKER.record_failure()
+        raise
+    if response.status_code >= 500:
+        _BREAKER.record_failure()
+    else:
+        _BREAKER.record_success()
+    return response
+
+@functools.lru_cache(maxsize=256)
+def _compile_filter(items: Tuple[Tuple[str, Hashable], ...]) -> Dict[str, Any]:
+    """
+    Build a Qdrant "must match" filter for the given (key, value) pairs.
+    
+    Results are cached, so callers must treat the returned dict as read-only.
+    """
+    return {"must": [{"key": k, "match": {"value": v}} for k, v in items]}
+
+def _build_filter(filter_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a (possibly cached) Qdrant filter for a field/value dictionary."""
+    items = tuple(sorted(filter_dict.items()))
+    try:
+        return _compile_filter(items)
+    except TypeError:
+        # Unhashable filter values can't be cached
+        return _compile_filter.__wrapped__(items)
+
+def check_qdrant_health(ttl: float = HEALTH_CHECK_TTL) -> bool:
+    """
+    Check if Qdrant is running and healthy.
+    
+    A successful check is cached for `ttl` seconds so repeated calls do not
+    each cost an HTTP round-trip.
+    """
+    global _last_healthy
+    now = time.monotonic()
+    if now - _last_healthy < ttl:
+        return True
+    try:
+        response = _request("GET", f"{QDRANT_URL}/readyz", session=_PROBE_SESSION,
+                            timeout=_TIMEOUTS["health"])
+        healthy = response.status_code == 200
+    except requests.exceptions.RequestException:
+        healthy = False
+    if healthy:
+        _last_healthy = now
+    return healthy
 
 def create_collections(vector_size: int = 384) -> Dict[str, bool]:
     """
     Create the necessary collections for storing code fragments and project metadata.
     
+    Collections already confirmed by an earlier call in this process cost no
+    request; existing collections that already index project_id cost one GET.
+    
     Args:
         vector_size: Dimension size of the vector embeddings
         
@@ -48,7 +256,17 @@ def create_collections(vector_size: int = 384) -> Dict[str, bool]:
         CODE_COLLECTION: {
             "vectors": {
                 "size": vector_size,
-                "distance": "Cosine"
+                "distance": "Cosine",
+                "on_disk": True  # Keep full-precision vectors on disk, used only for rescoring
+            },
+            "hnsw_config": {
+                "on_disk": True  # Page the HNSW graph from disk instead of pinning it in RAM
+            },
+            "quantization_config": {
+                "scalar": {
+                    "type": "int8",
+                    "always_ram": True  # Score against the int8 copy held in RAM
+                }
             },
             "optimizers_config": {
                 "indexing_threshold": 10000  # Smaller for faster indexing with less data
@@ -59,37 +277,95 @@ def create_collections(vector_size: int = 384) -> Dict[str, bool]:
             "vectors": {
                 "size": vector_size,
                 "distance": "Cosine"
-            }
+            },
+            "on_disk_payload": True  # Store payload on disk to save RAM
         }
     }
     
     # Create each collection
     for name, config in collections.items():
+        if name in _ready_collections:
+            results[name] = True
+            continue
+        
         url = f"{QDRANT_URL}/collections/{name}"
         try:
             # Check if collection exists
-            response = requests.get(url)
+            response = _request("GET", url, timeout=_TIMEOUTS["admin"])
             if response.status_code == 200:
                 print(f"Collection '{name}' already exists")
-                results[name] = True
-                continue
-                
-            # Create collection
-            response = requests.put(url, json=config)
-            results[name] = response.status_code == 200
-            if results[name]:
-                print(f"Created collection '{name}'")
+                payload_schema = (_loads(response.content).get("result") or {}).get("payload_schema") or {}
+                if "project_id" in payload_schema:
+                    _ready_collections.add(name)
+                    results[name] = True
+                    continue
             else:
-                print(f"Failed to create collection '{name}': {response.text}")
+                # Create collection
+                response = _request("PUT", url, json=config, timeout=_TIMEOUTS["admin"])
+                if response.status_code == 200:
+                    print(f"Created collection '{name}'")
+                else:
+                    print(f"Failed to create collection '{name}': {response.text}")
+                    results[name] = False
+                    continue
+            
+            # Index project_id so filtered scrolls and deletes don't scan every point
+            results[name] = create_payload_index(name, "project_id")
+            if results[name]:
+                _ready_collections.add(name)
         except requests.exceptions.RequestException as e:
             print(f"Error creating collection '{name}': {str(e)}")
             results[name] = False
     
     return results
 
+def create_payload_index(collection: str, field_name: str, field_schema: str = "keyword") -> bool:
+    """
+    Create a payload index on a collection field (no-op if it already exists).
+    
+    Args:
+        collection: Name of the collection
+        field_name: Payload field to index
+        field_schema: Qdrant field schema type
+        
+    Returns:
+        True if the index exists after the call
+    """
+    url = f"{QDRANT_URL}/collections/{collection}/index?wait=true"
+    try:
+        response = _request("PUT", url, json={"field_name": field_name, "field_schema": field_schema},
+                            timeout=_TIMEOUTS["admin"])
+        if response.status_code == 200:
+            return True
+        print(f"Failed to create index on '{collection}.{field_name}': {response.text}")
+        return False
+    except requests.exceptions.RequestException as e:
+        print(f"Error creating index on '{collection}.{field_name}': {str(e)}")
+        return False
+
+def _make_point(
+    code: str,
+    embedding: Union[List[float], np.ndarray],
+    filename: str,
+    project_id: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build a Qdrant point for a code fragment with a freshly generated ID."""
+    return {
+        "id": str(uuid.uuid4()),
+        "vector": _as_vector(embedding),
+        "payload": {
+            "code": code,
+            "filename": filename,
+            "project_id": project_id,
+            "created_at": "auto",  # Qdrant will add timestamp
+            **(metadata or {})
+        }
+    }
+
 def store_code_fragment(
     code: str,
-    embedding: List[float],
+    embedding: Union[List[float], np.ndarray],
     filename: str,
     project_id: str,
     metadata: Optional[Dict[str, Any]] = None
@@ -99,7 +375,7 @@ def store_code_fragment(
     
     Args:
         code: The code fragment text
-        embedding: Vector embedding of the code
+        embedding: Vector embedding of the code (list or numpy array)
         filename: Source filename
         project_id: ID of the project
         metadata: Additional metadata like function name, class name, etc.
@@ -107,29 +383,14 @@ def store_code_fragment(
     Returns:
         ID of the stored fragment
     """
-    if metadata is None:
-        metadata = {}
-    
-    # Generate a unique ID
-    point_id = str(uuid.uuid4())
-    
     # Prepare the point data
-    point = {
-        "id": point_id,
-        "vector": embedding,
-        "payload": {
-            "code": code,
-            "filename": filename,
-            "project_id": project_id,
-            "created_at": "auto",  # Qdrant will add timestamp
-            **metadata
-        }
-    }
+    point = _make_point(code, embedding, filename, project_id, metadata)
+    point_id = point["id"]
     
     # Store the point
     url = f"{QDRANT_URL}/collections/{CODE_COLLECTION}/points"
     try:
-        response = requests.put(url, json={"points": [point]})
+        response = _send_json("PUT", url, {"points": [point]}, timeout=_TIMEOUTS["upsert"])
         if response.status_code == 200:
             print(f"Stored code fragment with ID: {point_id}")
             return point_id
@@ -140,37 +401,137 @@ def store_code_fragment(
         print(f"Error storing code fragment: {str(e)}")
         return ""
 
+def store_code_fragments(fragments: List[Dict[str, Any]], project_id: str) -> List[str]:
+    """
+    Store several code fragments in Qdrant with a single upsert.
+    
+    Args:
+        fragments: Dicts with "code", "embedding", "filename" and optional "metadata" keys
+        project_id: ID of the project
+        
+    Returns:
+        IDs of the stored fragments (empty list on failure)
+    """
+    if not fragments:
+        return []
+    
+    points = [
+        _make_point(f["code"], f["embedding"], f["filename"], project_id, f.get("metadata"))
+        for f in fragments
+    ]
+    
+    url = f"{QDRANT_URL}/collections/{CODE_COLLECTION}/points"
+    try:
+        response = _send_json("PUT", url, {"points": points}, timeout=_TIMEOUTS["upsert"])
+        if response.status_code == 200:
+            print(f"Stored {len(points)} code fragments")
+            return [point["id"] for point in points]
+        else:
+            print(f"Failed to store code fragments: {response.text}")
+            return []
+    except requests.exceptions.RequestException as e:
+        print(f"Error storing code fragments: {str(e)}")
+        return []
+
+async def aindex_fragments(
+    texts: Sequence[str],
+    filenames: Sequence[str],
+    project_id: str,
+    embed_fn: Callable[[List[str]], Sequence[Union[List[float], np.ndarray]]],
+    batch_size: int = 64,
+    metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+) -> List[str]:
+    """
+    Embed and store code fragments in batches, overlapping embedding with upserts.
+    
+    Each batch is embedded in a worker thread; its upsert is then started in the
+    background while the next batch is embedded.
+    
+    Args:
+        texts: Code fragment texts
+        filenames: Source filename for each fragment
+        project_id: ID of the project
+        embed_fn: Callable that embeds a list of texts (e.g. SentenceTransformer.encode)
+        batch_size: Number of fragments per embedding call and upsert
+        metadata: Optional per-fragment metadata
+        
+    Returns:
+        IDs of the stored fragments, in input order, for batches that were stored
+        
+    Raises:
+        ValueError: If filenames or metadata don't match texts in length, or
+            embed_fn returns a different number of vectors than it was given texts
+    """
+    if len(filenames) != len(texts):
+        raise ValueError(f"Got {len(filenames)} filenames for {len(texts)} fragments")
+    if metadata and len(metadata) != len(texts):
+        raise ValueError(f"Got {len(metadata)} metadata entries for {len(texts)} fragments")
+    
+    upserts = []
+    for start in range(0, len(texts), batch_size):
+        end = start + batch_size
+        chunk = list(texts[start:end])
+        vectors = await asyncio.to_thread(embed_fn, chunk)
+        if len(vectors) != len(chunk):
+            # Let the batches already started finish before reporting the error
+            await asyncio.gather(*upserts, return_exceptions=True)
+            raise ValueError(
+                f"Embedding returned {len(vectors)} vectors for {len(chunk)} fragments "
+                f"(fragments {start}-{start + len(chunk) - 1})"
+            )
+        fragments = [
+            {
+                "code": code,
+                "embedding": vector,
+                "filename": filename,
+                "metadata": metadata[start + i] if metadata else None,
+            }
+            for i, (code, vector, filename) in enumerate(zip(chunk, vectors, filenames[start:end]))
+        ]
+        upserts.append(asyncio.create_task(
+            asyncio.to_thread(store_code_fragments, fragments, project_id)
+        ))
+    
+    results = await asyncio.gather(*upserts)
+    return [point_id for ids in results for point_id in ids]
+
+def index_fragments(*args, **kwargs) -> List[str]:
+    """Synchronous wrapper around aindex_fragments()."""
+    return asyncio.run(aindex_fragments(*args, **kwargs))
+
 def search_similar_code(
-    embedding: List[float],
+    embedding: Union[List[float], np.ndarray],
     limit: int = 5,
-    filter_dict: Optional[Dict[str, Any]] = None
+    filter_dict: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """
     Search for similar code fragments.
     
     Args:
-        embedding: Vector to search for
+        embedding: Vector to search for (list or numpy array)
         limit: Maximum number of results
         filter_dict: Filter to apply (e.g., by project_id, filename)
+        fields: Optional payload fields to return. If None, returns the full payload.
         
     Returns:
         List of matching code fragments with similarity scores
     """
     query = {
-        "vector": embedding,
+        "vector": _as_vector(embedding),
         "limit": limit,
-        "with_payload": True,
+        "with_payload": {"include": fields} if fields else True,
         "with_vectors": False,  # Don't need the vectors back
     }
     
     if filter_dict:
-        query["filter"] = {"must": [{"key": k, "match": {"value": v}} for k, v in filter_dict.items()]}
+        query["filter"] = _build_filter(filter_dict)
     
     url = f"{QDRANT_URL}/collections/{CODE_COLLECTION}/points/search"
     try:
-        response = requests.post(url, json=query)
+        response = _send_json("POST", url, query, timeout=_TIMEOUTS["search"])
         if response.status_code == 200:
-            return response.json().get("result", [])
+            return _loads(response.content).get("result", [])
         else:
             print(f"Failed to search: {response.text}")
             return []
@@ -178,6 +539,101 @@ def search_similar_code(
         print(f"Error during search: {str(e)}")
         return []
 
+def search_similar_code_batch(
+    embeddings: Sequence[Union[List[float], np.ndarray]],
+    limit: int = 5,
+    filter_dict: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run several similarity searches in a single request.
+    
+    Args:
+        embeddings: Vectors to search for (lists or numpy arrays)
+        limit: Maximum number of results per search
+        filter_dict: Filter applied to every search (e.g., by project_id)
+        fields: Optional payload fields to return. If None, returns the full payload.
+        
+    Returns:
+        One list of matching code fragments per input vector
+    """
+    base = {
+        "limit": limit,
+        "with_payload": {"include": fields} if fields else True,
+        "with_vectors": False,
+    }
+    if filter_dict:
+        base["filter"] = _build_filter(filter_dict)
+    searches = [{**base, "vector": _as_vector(embedding)} for embedding in embeddings]
+    
+    url = f"{QDRANT_URL}/collections/{CODE_COLLECTION}/points/search/batch"
+    try:
+        response = _send_json("POST", url, {"searches": searches}, timeout=_TIMEOUTS["search"])
+        if response.status_code == 200:
+            return _loads(response.content).get("result", [])
+        else:
+            print(f"Failed to run batch search: {response.text}")
+            return []
+    except requests.exceptions.RequestException as e:
+        print(f"Error during batch search: {str(e)}")
+        return []
+
+def _scroll_point_ids(
+    collection: str,
+    filter_dict: Dict[str, Any],
+    max_points: int
+) -> Optional[List[Any]]:
+    """
+    Collect the IDs of points matching a filter.
+    
+    Args:
+        collection: Name of the collection to scroll
+        filter_dict: Qdrant filter to apply
+        max_points: Stop and return None once more than this many points match
+        
+    Returns:
+        List of point IDs, or None if the match count exceeds max_points
+    """
+    url = f"{QDRANT_URL}/collections/{collection}/points/scroll"
+    ids = []
+    offset = None
+    while True:
+        body = {
+            "filter": filter_dict,
+            "limit": SCROLL_PAGE_SIZE,
+            "with_payload": False,
+            "with_vector": False,
+        }
+        if offset is not None:
+            body["offset"] = offset
+        response = _request("POST", url, json=body, timeout=_TIMEOUTS["search"])
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(f"Scroll failed: {response.text}")
+        result = _loads(response.content).get("result", {})
+        ids.extend(point["id"] for point in result.get("points", []))
+        if len(ids) > max_points:
+            return None
+        offset = result.get("next_page_offset")
+        if offset is None:
+            return ids
+
+def _delete_matching_points(collection: str, filter_dict: Dict[str, Any]) -> bool:
+    """
+    Delete all points in a collection matching a filter.
+    
+    Small result sets are deleted by ID; larger ones fall back to a
+    filtered delete, which Qdrant resolves through the payload index.
+    """
+    url = f"{QDRANT_URL}/collections/{collection}/points/delete"
+    ids = _scroll_point_ids(collection, filter_dict, SMALL_DELETE_THRESHOLD)
+    if ids is None:
+        response = _request("POST", url, json={"filter": filter_dict}, timeout=_TIMEOUTS["delete"])
+    elif ids:
+        response = _request("POST", url, json={"points": ids}, timeout=_TIMEOUTS["delete"])
+    else:
+        return True
+    return response.status_code == 200
+
 def delete_project_data(project_id: str) -> bool:
     """
     Delete all code fragments and metadata for a specific project.
@@ -188,27 +644,14 @@ def delete_project_data(project_id: str) -> bool:
     Returns:
         True if deletion was successful
     """
-    filter_dict = {
-        "must": [
-            {
-                "key": "project_id",
-                "match": {
-                    "value": project_id
-                }
-            }
-        ]
-    }
+    filter_dict = _build_filter({"project_id": project_id})
     
-    # Delete from code collection
-    url = f"{QDRANT_URL}/collections/{CODE_COLLECTION}/points/delete"
     try:
-        response = requests.post(url, json={"filter": filter_dict})
-        code_success = response.status_code == 200
+        # Delete from code collection
+        code_success = _delete_matching_points(CODE_COLLECTION, filter_dict)
         
         # Also delete from project collection
-        url = f"{QDRANT_URL}/collections/{PROJECT_COLLECTION}/points/delete"
-        response = requests.post(url, json={"filter": filter_dict})
-        proj_success = response.status_code == 200
+        proj_success = _delete_matching_points(PROJECT_COLLECTION, filter_dict)
         
         return code_success and proj_success
     except requests.exceptions.RequestException as e:
@@ -224,9 +667,10 @@ def list_projects() -> List[Dict[str, Any]]:
     """
     url = f"{QDRANT_URL}/collections/{PROJECT_COLLECTION}/points/scroll"
     try:
-        response = requests.post(url, json={"limit": 100, "with_payload": True})
+        response = _request("POST", url, json={"limit": 100, "with_payload": True},
+                            timeout=_TIMEOUTS["search"])
         if response.status_code == 200:
-            return [point["payload"] for point in response.json().get("result", {}).get("points", [])]
+            return [point["payload"] for point in _loads(response.content).get("result", {}).get("points", [])]
         else:
             print(f"Failed to list projects: {response.text}")
             return []
@@ -234,6 +678,119 @@ def list_projects() -> List[Dict[str, Any]]:
         print(f"Error listing projects: {str(e)}")
         return []
 
+# Operations exposed by the `serve` daemon
+_DAEMON_OPS = {
+    "health": check_qdrant_health,
+    "init": create_collections,
+    "store": store_code_fragment,
+    "store-batch": store_code_fragments,
+    "search": search_similar_code,
+    "search-batch": search_similar_code_batch,
+    "list-projects": list_projects,
+    "delete-project": delete_project_data,
+}
+
+async def _handle_daemon_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serve newline-delimited JSON requests of the form {"op": ..., "args": {...}}."""
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # The line exceeded DAEMON_MAX_REQUEST; the rest of it can't be resynced, so reply and hang up
+                writer.write(_dumps({"ok": False, "error": f"Request larger than {DAEMON_MAX_REQUEST} bytes"}) + b"\n")
+                await writer.drain()
+                break
+            if not line:
+                break
+            try:
+                request = _loads(line)
+                func = _DAEMON_OPS.get(request.get("op"))
+                if func is None:
+                    reply = {"ok": False, "error": f"Unknown operation: {request.get('op')}"}
+                else:
+                    result = await asyncio.to_thread(func, **request.get("args", {}))
+                    reply = {"ok": True, "result": result}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            writer.write(_dumps(reply) + b"\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+def _daemon_is_running(socket_path: str) -> bool:
+    """Return True if something accepts connections on socket_path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+def _prepare_socket_path(socket_path: str) -> bool:
+    """
+    Make socket_path safe to bind: a private parent directory and no live daemon on it.
+    
+    A stale socket left by a crashed daemon is removed; anything else at the
+    path is left alone.
+    
+    Returns:
+        True if the daemon may bind socket_path
+    """
+    parent = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(parent, mode=0o700, exist_ok=True)
+    if parent == os.path.abspath(DAEMON_DIR):
+        info = os.stat(parent)
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            print(f"Refusing to use {parent}: it must be owned by you and not accessible to others")
+            return False
+    
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(info.st_mode):
+        print(f"Refusing to replace {socket_path}: it is not a socket")
+        return False
+    if _daemon_is_running(socket_path):
+        print(f"A Qdrant helper daemon is already listening on {socket_path}")
+        return False
+    os.remove(socket_path)
+    return True
+
+async def _serve(socket_path: str) -> bool:
+    """
+    Run the helper as a daemon listening on a Unix socket.
+    
+    The socket is created with mode 0600, so only the current user can connect.
+    
+    Returns:
+        False if the socket path couldn't be used; otherwise runs until cancelled
+    """
+    if not _prepare_socket_path(socket_path):
+        return False
+    
+    # Bind under a restrictive umask so the socket is never briefly accessible to others
+    old_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(_handle_daemon_client, path=socket_path, limit=DAEMON_MAX_REQUEST)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)
+    socket_inode = os.stat(socket_path).st_ino
+    print(f"Qdrant helper listening on {socket_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        # Only remove the socket if it is still ours
+        try:
+            if os.lstat(socket_path).st_ino == socket_inode:
+                os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+    return True
+
 def main():
     """Command-line interface for Qdrant helper."""
     parser = argparse.ArgumentParser(description="Qdrant Helper for AI Development Agent")
@@ -254,6 +811,11 @@ def main():
     delete_parser = subparsers.add_parser("delete-project", help="Delete all data for a project")
     delete_parser.add_argument("project_id", help="Project ID to delete")
     
+    # Daemon command
+    serve_parser = subparsers.add_parser("serve", help="Run as a daemon on a Unix socket (see qdrant_helperc.py)")
+    serve_parser.add_argument("--socket", default=DAEMON_SOCKET,
+                              help=f"Socket path (default: {DAEMON_SOCKET})")
+    
     args = parser.parse_args()
     
     # Execute commands
@@ -289,6 +851,13 @@ def main():
         print(f"Project deletion {'successful' if success else 'failed'}")
         sys.exit(0 if success else 1)
     
+    elif args.command == "serve":
+        try:
+            if not asyncio.run(_serve(args.socket)):
+                sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+    
     else:
         parser.print_help()
         sys.exit(1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Thin client for the Qdrant Helper daemon.
+Forwards commands to `qdrant_helper.py serve` over a Unix socket, so repeated
+calls skip the interpreter startup and heavy imports of the full helper.
+"""
+
+import os
+import sys
+import json
+import socket
+import tempfile
+from typing import Any, Optional
+
+# Must match the default in qdrant_helper.py, which this client avoids importing
+DAEMON_DIR = os.getenv("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"qdrant_helper-{os.getuid()}")
+DAEMON_SOCKET = os.getenv("QDRANT_HELPER_SOCKET") or os.path.join(DAEMON_DIR, "qdrant_helper.sock")
+
+def call(op: str, socket_path: Optional[str] = None, **args) -> Any:
+    """
+    Send an operation to the daemon and return its result.
+    
+    Args:
+        op: Operation name (e.g. "health", "search", "list-projects")
+        socket_path: Daemon socket path. If None, uses QDRANT_HELPER_SOCKET.
+        **args: Keyword arguments for the operation
+        
+    Returns:
+        The operation's result
+        
+    Raises:
+        RuntimeError: If the daemon reports an error or closes the connection without replying
+        OSError: If the daemon is not reachable
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or DAEMON_SOCKET)
+        sock.sendall(json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise RuntimeError("Daemon closed the connection without replying")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "Unknown daemon error"))
+    return reply.get("result")
+
+def main():
+    """Command-line interface: qdrant_helperc.py <op> ['<json args>']"""
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("Usage: qdrant_helperc.py <op> ['<json args>']")
+        print("Example: qdrant_helperc.py delete-project '{\"project_id\": \"my-project\"}'")
+        sys.exit(1)
+    
+    args = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+    try:
+        result = call(sys.argv[1], **args)
+    except OSError as e:
+        print(f"Cannot reach Qdrant helper daemon at {DAEMON_SOCKET}: {e}")
+        print("Start it with: ./qdrant_helper.py serve")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result is not False else 1)
+
+if __name__ == "__main__":
+    main()
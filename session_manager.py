@@ -10,12 +10,38 @@ context across multiple interactions with the agent.
 import os
 import sys
 import json
-import yaml
+import asyncio
 import sqlite3
 import logging
 import datetime
-import uuid
-from typing import Dict, List, Any, Optional, Union
+import functools
+import itertools
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import mmap
+import pickle
+import queue
+import re
+import reprlib
+import secrets
+import threading
+import time
+import urllib.parse
+import warnings
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Union, Callable, Iterator, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Configure logging
 logging.basicConfig(
@@ -24,16 +50,433 @@ logging.basicConfig(
 )
 logger = logging.getLogger("session_manager")
 
+# Applied to every database connection. WAL mode is persistent once set on the file;
+# busy_timeout makes a second process wait for the write lock instead of failing
+DB_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "busy_timeout=5000",
+    "temp_store=MEMORY",
+    "cache_size=-65536",
+)
+
+# Statements issued on every save/load. Defined once so each maps to a single entry in
+# the connection's prepared-statement cache (sized by DB_STATEMENT_CACHE_SIZE)
+DB_STATEMENT_CACHE_SIZE = 128
+_SQL_GET_ACTIVE = 'SELECT session_id FROM active_session WHERE id = 1'
+_SQL_SET_ACTIVE = (
+    'INSERT INTO active_session (id, session_id, timestamp) VALUES (1, ?, ?) '
+    'ON CONFLICT(id) DO UPDATE SET session_id = excluded.session_id, timestamp = excluded.timestamp'
+)
+_SQL_SESSION_EXISTS = 'SELECT id FROM sessions WHERE id = ?'
+_SQL_UPSERT_SESSION = (
+    'INSERT INTO sessions (id, name, description, project_id, status, created_at, updated_at, metadata) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT(id) DO UPDATE SET name = excluded.name, description = excluded.description, '
+    'project_id = excluded.project_id, status = excluded.status, '
+    'updated_at = excluded.updated_at, metadata = excluded.metadata'
+)
+_SQL_SELECT_META = 'SELECT metadata FROM sessions WHERE id = ?'
+# Columns are aliased to the metadata keys callers expect, so rows map straight to dicts
+_SQL_LIST_SESSIONS = (
+    'SELECT id, name, description, project_id, status, '
+    'created_at AS start_time, updated_at AS last_activity '
+    'FROM sessions ORDER BY updated_at DESC'
+)
+_SQL_DELETE_SESSION = 'DELETE FROM sessions WHERE id = ?'
+_SQL_INSERT_HISTORY = (
+    'INSERT INTO session_history '
+    '(session_id, seq, timestamp, command, args, result, error, working_directory) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+)
+_SQL_NEXT_HISTORY_SEQ = 'SELECT COALESCE(MAX(seq) + 1, 0) FROM session_history WHERE session_id = ?'
+_SQL_COUNT_HISTORY = 'SELECT COUNT(*) FROM session_history WHERE session_id = ?'
+_SQL_DELETE_HISTORY = 'DELETE FROM session_history WHERE session_id = ?'
+_SQL_SELECT_HISTORY = (
+    'SELECT timestamp, command, args, working_directory, result, error '
+    'FROM session_history WHERE session_id = ?'
+)
+# Keeps commands containing non-ASCII characters, which LIKE doesn't case-fold
+_SQL_HISTORY_COMMAND_FILTER = " AND (command LIKE ? ESCAPE '\\' OR command GLOB ?)"
+_NON_ASCII_GLOB = "*[^\x01-\x7f]*"
+_SQL_HISTORY_COMMAND_MATCH = " AND command_match(?, command)"
+
+# Upper bound on read-only connections kept by each manager, so reads from several
+# threads (e.g. AsyncSessionManager) don't queue behind writes on the shared connection
+DB_READ_POOL_SIZE = os.cpu_count() or 4
+
+# Write transactions between WAL checkpoints that truncate the -wal file, keeping it
+# from growing for the lifetime of a long-running manager
+WAL_CHECKPOINT_EVERY = 500
+
+# Threads reading session files in parallel during migrate()
+MIGRATE_WORKERS = 8
+
+# Number of sessions whose loaded data is kept by load_session_data
+LOAD_CACHE_SIZE = 64
+
+# PRAGMA user_version milestones: history moved into session_history, then
+# sessions that only existed as files copied into the database
+DB_VERSION_HISTORY_TABLE = 1
+DB_VERSION_FILES_MIGRATED = 2
+
 # Default paths
 DEFAULT_CONFIG_DIR = os.path.expanduser("~/.devagent")
 DEFAULT_SESSIONS_DIR = os.path.join(DEFAULT_CONFIG_DIR, "sessions")
 DEFAULT_DB_PATH = os.path.join(DEFAULT_CONFIG_DIR, "sessions.db")
 
+# Results of read-only CLI commands (list, active) are cached here between invocations
+CLI_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "session_manager"
+)
+CLI_CACHE_TTL = 60.0
+
+# Batched CLI output is written whenever this many bytes have been collected
+CLI_WRITE_BATCH_BYTES = 65536
+
+# Session files are written as JSON; YAML files are still read for older sessions
+SESSION_FILE_SUFFIX = ".json"
+LEGACY_SESSION_SUFFIXES = (".yaml", ".yml")
+
+# Session documents larger than this are written zstd-compressed when zstandard is installed
+COMPRESSED_SESSION_SUFFIX = ".json.zst"
+COMPRESS_MIN_BYTES = 4096
+
+# Database JSON values larger than COMPRESS_MIN_BYTES are stored as zstd BLOBs at this level;
+# smaller ones stay plain TEXT. Compressed values are recognized by the zstd frame magic
+DB_COMPRESS_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+HISTORY_LOG_SUFFIX = ".hist.jsonl"
+
+# Per-session metadata sidecars written by older versions; removed along with their session
+META_SIDECAR_SUFFIX = ".meta.json"
+
+# Temporary files are named <path>.tmp.<pid>.<thread id> until renamed into place
+TMP_FILE_MARKER = ".tmp."
+
+# History entries are appended to the log immediately; the main session file
+# is rewritten after this many appends or this many seconds, whichever comes first
+HISTORY_FLUSH_EVERY = 20
+HISTORY_FLUSH_INTERVAL = 5.0
+
+# The active session's file is rewritten at most once per this many seconds; changes
+# in between are written by the next save after the interval or by flush()
+SESSION_FILE_DEBOUNCE = 2.0
+
+# Environment recorded in the context of every new session; invariant per process
+_ENV_BLOCK = {
+    "python_version": sys.version,
+    "platform": sys.platform
+}
+
+# Session files larger than this are memory-mapped when read
+MMAP_MIN_BYTES = 4096
+
+# Bound once; used for every duration computation
+_fromiso = datetime.datetime.fromisoformat
+
+ZERO_DURATION = str(datetime.timedelta(0))
+
+# Session listings at least this large compute durations with numpy
+VECTORIZE_MIN_SESSIONS = 256
+
+def _json_dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is installed; indent by two spaces if indent is set."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            pass  # Fall back to the stdlib for values orjson rejects (e.g. huge ints)
+    return json.dumps(data, indent=2 if indent else None).encode("utf-8")
+
+def _db_json(data: Any) -> Union[str, bytes]:
+    """
+    Serialize data for storage in a database column.
+    
+    Large values become a zstd-compressed BLOB when zstandard is installed,
+    shrinking the pages SQLite rewrites on every update; others are JSON text.
+    """
+    encoded = _json_dumps(data)
+    if zstandard is not None and len(encoded) > COMPRESS_MIN_BYTES:
+        return zstandard.compress(encoded, DB_COMPRESS_LEVEL)
+    return encoded.decode("utf-8")
+
+def _db_loads(value: Union[str, bytes]) -> Any:
+    """Deserialize a database column written by `_db_json` (or plain JSON text)."""
+    if isinstance(value, bytes) and value.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read compressed session data")
+        value = zstandard.decompress(value)
+    return _json_loads(value)
+
+def _json_dumps_line(data: Any) -> bytes:
+    """Serialize data to a newline-terminated JSON line (one JSONL record)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+            )
+        except TypeError:
+            pass
+    return json.dumps(data).encode("utf-8") + b"\n"
+
+def _write_all(path: str, data: bytes, mode: str = 'wb', fsync: bool = False) -> None:
+    """
+    Write bytes to a file without a buffered writer.
+    
+    The data is already fully serialized, so going through io.BufferedWriter
+    would only add a copy; unbuffered writes go straight to write(2).
+    
+    Args:
+        path: File to write
+        data: Bytes to write
+        mode: File mode, 'wb' or 'ab'
+        fsync: Whether to flush the file to disk before closing it
+    """
+    with open(path, mode, buffering=0) as f:
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view):]
+        if fsync:
+            os.fsync(f.fileno())
+
+def _fsync_dir(path: str) -> None:
+    """Flush a directory's entries (e.g. renames into it) to disk, where the platform allows it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Directories can't be fsynced on some platforms (e.g. Windows)
+    finally:
+        os.close(fd)
+
+def _read_small_file(path: str, chunk_size: int = 65536) -> bytes:
+    """
+    Read a whole file with raw os.open/os.read calls.
+    
+    Skips the buffered file object, so a small file costs three syscalls
+    (open, read, close) instead of the five or six that open().read() issues.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return _read_fd(fd, chunk_size)
+    finally:
+        os.close(fd)
+
+def _read_fd(fd: int, chunk_size: int = 65536) -> bytes:
+    """Read an open file descriptor to the end."""
+    parts = []
+    while True:
+        data = os.read(fd, chunk_size)
+        parts.append(data)
+        if len(data) < chunk_size:
+            return b"".join(parts)
+
+def _now_iso() -> str:
+    """
+    Return the current local time in ISO 8601 format.
+    
+    Microseconds are kept: history entries are compared against the session's
+    start time, and commands in the session's first second must not sort before it.
+    """
+    return datetime.datetime.now().isoformat()
+
+def _new_session_id(now: datetime.datetime) -> str:
+    """Generate a session ID from a timestamp and a random suffix, e.g. session-20240101120000-1a2b3c."""
+    return f"session-{now.strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(3)}"
+
+def _set_durations(sessions: List[Dict[str, Any]]) -> None:
+    """
+    Set "duration" on every session metadata dict that has a start and last activity time.
+    
+    Large listings parse all timestamps in one numpy pass; smaller ones, and
+    timestamps numpy can't represent (e.g. with a UTC offset), use fromisoformat.
+    """
+    timed = [m for m in sessions if "start_time" in m and "last_activity" in m]
+    
+    if len(timed) >= VECTORIZE_MIN_SESSIONS:
+        try:
+            # Imported lazily: it is only worth its import time for large listings
+            import numpy as np
+            
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                starts = np.array([m["start_time"] for m in timed], dtype="datetime64[us]")
+                lasts = np.array([m["last_activity"] for m in timed], dtype="datetime64[us]")
+            if not (np.isnat(starts).any() or np.isnat(lasts).any()):
+                microseconds = (lasts - starts).astype("int64").tolist()
+                for session_meta, us in zip(timed, microseconds):
+                    session_meta["duration"] = str(datetime.timedelta(microseconds=us))
+                return
+        except (ImportError, ValueError, TypeError, Warning):
+            pass
+    
+    for session_meta in timed:
+        start = session_meta["start_time"]
+        last = session_meta["last_activity"]
+        if start == last:
+            # Never touched since creation; no need to parse
+            session_meta["duration"] = ZERO_DURATION
+            continue
+        try:
+            session_meta["duration"] = str(_fromiso(last) - _fromiso(start))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Error reading session {session_meta.get('id')}: {e}")
+
+@functools.lru_cache(maxsize=64)
+def _compile_command_filter(command_filter: str) -> "re.Pattern":
+    """Compile a case-insensitive substring filter for history commands."""
+    return re.compile(re.escape(command_filter), re.IGNORECASE)
+
+@functools.lru_cache(maxsize=64)
+def _compile_line_filter(command_filter: str) -> Optional[Callable[[bytes], bool]]:
+    """
+    Compile a pre-filter for raw history log lines.
+    
+    A line whose raw JSON doesn't contain the filter text can't hold a matching
+    command, so it needn't be parsed. This only holds for printable ASCII filters
+    without quotes or backslashes, which JSON encodes verbatim; for other
+    filters None is returned. Lines with non-ASCII text or \\u escapes are
+    always kept, since case-insensitive matching may fold them onto ASCII.
+    
+    Returns:
+        Predicate on raw lines, or None if the filter can't be applied to raw JSON
+    """
+    if not all(" " <= c <= "~" and c not in '"\\' for c in command_filter):
+        return None
+    search = re.compile(re.escape(command_filter.encode("ascii")), re.IGNORECASE).search
+    
+    def line_filter(line: bytes) -> bool:
+        return bool(search(line)) or not line.isascii() or b"\\u" in line
+    
+    return line_filter
+
+def _atomic_write(path: str, data: bytes, fsync: bool = True) -> None:
+    """
+    Write a file by writing a temporary file next to it and renaming it into place.
+    
+    Readers see either the old or the new contents, never a partial write. With
+    fsync, the contents are on disk before the rename, so a crash can't leave an
+    empty or truncated file either; the rename itself becomes durable once the
+    directory is synced with `_fsync_dir`.
+    """
+    tmp_path = f"{path}{TMP_FILE_MARKER}{os.getpid()}.{threading.get_ident()}"
+    try:
+        _write_all(tmp_path, data, fsync=fsync)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _read_json_file(path: str) -> Any:
+    """
+    Read and parse a JSON file.
+    
+    Files larger than MMAP_MIN_BYTES are memory-mapped and handed to orjson as
+    a buffer, avoiding a copy of the contents into a bytes object; smaller files
+    are read with `_read_small_file`, where the mapping isn't worth its setup.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if orjson is not None and os.fstat(fd).st_size > MMAP_MIN_BYTES:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+        data = _read_fd(fd)
+    finally:
+        os.close(fd)
+    return _json_loads(data)
+
+def _yaml_safe_load(stream) -> Any:
+    """
+    Parse YAML with PyYAML's safe loader.
+    
+    PyYAML is imported on first use: only legacy session files and YAML imports
+    need it, and it accounts for a large share of this module's import time.
+    The libyaml-based CSafeLoader is used when PyYAML was built with it.
+    """
+    import yaml
+    return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _normalize_session_data(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make sure a loaded session has the slots the mutators write to.
+    
+    Sessions created by `create_session` already have them; older or imported
+    sessions may not, so this runs once on load instead of on every mutation.
+    """
+    session_data.setdefault("history", [])
+    session_data.setdefault("context", {})
+    session_data.setdefault("state", {}).setdefault("variables", {})
+    return session_data
+
+def _command_match(command_filter: str, command: Optional[str]) -> bool:
+    """SQL function command_match(filter, command): the history command filter, for use in queries."""
+    return command is not None and _compile_command_filter(command_filter).search(command) is not None
+
+def _history_row(session_id: str, seq: int, entry: Dict[str, Any]) -> tuple:
+    """Convert a history entry into a session_history row."""
+    args = entry.get("args")
+    result = entry.get("result")
+    return (
+        session_id,
+        seq,
+        entry.get("timestamp"),
+        entry.get("command"),
+        None if args is None else _db_json(args),
+        None if result is None else _db_json(result),
+        entry.get("error"),
+        entry.get("working_directory")
+    )
+
+def _history_entry(row: tuple) -> Dict[str, Any]:
+    """Convert a session_history row back into a history entry."""
+    timestamp, command, args, working_directory, result, error = row
+    entry = {"command": command} if timestamp is None else {"timestamp": timestamp, "command": command}
+    if args is not None:
+        entry["args"] = _db_loads(args)
+    if working_directory is not None:
+        entry["working_directory"] = working_directory
+    if result is not None:
+        entry["result"] = _db_loads(result)
+    if error is not None:
+        entry["error"] = error
+    return entry
+
+def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Return a cursor of conn that yields plain tuples, whatever the connection's row factory."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+def _connect_db(db_path: str, **kwargs) -> sqlite3.Connection:
+    """Open a connection to the session database with DB_PRAGMAS applied."""
+    conn = sqlite3.connect(db_path, **kwargs)
+    for pragma in DB_PRAGMAS:
+        conn.execute('PRAGMA ' + pragma)
+    return conn
+
 def init_session_db(db_path: str) -> None:
     """Initialize the session database."""
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    conn = sqlite3.connect(db_path)
+    # Switches a newly created database file to WAL before any table exists
+    conn = _connect_db(db_path)
     cursor = conn.cursor()
     
     # Create the sessions table if it doesn't exist
@@ -50,15 +493,63 @@ def init_session_db(db_path: str) -> None:
     )
     ''')
     
-    # Create the active_session table
+    # Create the active_session table; it holds a single row with id 1
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS active_session (
-        id INTEGER PRIMARY KEY,
+        id INTEGER PRIMARY KEY CHECK (id = 1),
         session_id TEXT,
         timestamp TEXT
     )
     ''')
     
+    # Older versions could leave rows with other ids; keep the latest as row 1
+    if cursor.execute('SELECT 1 FROM active_session WHERE id != 1 LIMIT 1').fetchone():
+        cursor.execute('''
+        INSERT OR REPLACE INTO active_session (id, session_id, timestamp)
+        SELECT 1, session_id, timestamp FROM active_session ORDER BY id DESC LIMIT 1
+        ''')
+        cursor.execute('DELETE FROM active_session WHERE id != 1')
+    
+    # Listing sorts by last activity
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at DESC)')
+    
+    # Command history, one row per entry. The primary key also serves
+    # newest-first scans, so no separate (session_id, seq DESC) index is needed
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS session_history (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        timestamp TEXT,
+        command TEXT,
+        args TEXT,
+        result TEXT,
+        error TEXT,
+        working_directory TEXT,
+        PRIMARY KEY (session_id, seq)
+    )
+    ''')
+    
+    # Older databases kept the history inside each session's JSON; move it to the table once
+    if cursor.execute('PRAGMA user_version').fetchone()[0] < DB_VERSION_HISTORY_TABLE:
+        for session_id, session_json in cursor.execute('SELECT id, metadata FROM sessions').fetchall():
+            try:
+                session_data = _db_loads(session_json)
+            except (TypeError, ValueError):
+                continue
+            history = session_data.pop("history", None)
+            if not history:
+                continue
+            cursor.execute(_SQL_DELETE_HISTORY, (session_id,))
+            cursor.executemany(
+                _SQL_INSERT_HISTORY,
+                (_history_row(session_id, seq, entry) for seq, entry in enumerate(history))
+            )
+            cursor.execute(
+                'UPDATE sessions SET metadata = ? WHERE id = ?',
+                (_db_json(session_data), session_id)
+            )
+        cursor.execute(f'PRAGMA user_version = {DB_VERSION_HISTORY_TABLE}')
+    
     conn.commit()
     conn.close()
     
@@ -78,20 +569,89 @@ class SessionManager:
         self.sessions_dir = sessions_dir or DEFAULT_SESSIONS_DIR
         self.db_path = db_path or DEFAULT_DB_PATH
         
+        # Directory prefix with trailing separator, so session paths are a plain concatenation
+        self._prefix = os.path.join(self.sessions_dir, "")
+        
+        # Compression runs on the writer thread only; zstd contexts aren't shared between
+        # threads, so reads (which may run in parallel) use the one-shot zstandard.decompress
+        if zstandard is not None:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=1)
+        else:
+            self._zstd_compressor = None
+        
         # Ensure directories and database exist
         self.ensure_sessions_dir()
         init_session_db(self.db_path)
         
+        # One long-lived connection keeps SQLite's page cache warm across calls. It runs in
+        # autocommit mode; statements that belong together use _transaction()
+        self._conn = _connect_db(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE_SIZE
+        )
+        self._conn.create_function("command_match", 2, _command_match, deterministic=True)
+        self._db_lock = threading.RLock()
+        self._writes_since_checkpoint = 0
+        
+        # Read-only connections handed out by _reader(), opened on demand
+        self._read_pool = queue.LifoQueue()
+        self._read_conns = []
+        
         # Load active session
         self.active_session = self.get_active_session_id()
         self.session_data = {}
         
+        # Changes (history appends, debounced saves) not yet reflected in the active session's main file
+        self._pending_appends = 0
+        self._dirty_since = None
+        self._last_file_save = 0.0
+        
+        # Session files are written by a background thread; the hot path only queues snapshots
+        self._history_logs = set()
+        self._write_queue = queue.Queue(maxsize=256)
+        self._writer = threading.Thread(target=self._writer_loop, name="session-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+        self._closed = False
+        
+        # Writes recorded inside batch(), flushed when the outermost batch exits
+        self._batch_depth = 0
+        self._batch_rows = {}
+        self._batch_files = {}
+        
+        # session_id -> (history list, number of its entries already in the database).
+        # Other managers may append rows to the same session, so the next free seq
+        # can't tell which in-memory entries are new
+        self._persisted_history = {}
+        
+        # Cached list_sessions() result; bumping _version on writes invalidates it
+        self._version = 0
+        self._list_cache = None
+        self._list_cache_key = None
+        
+        # Pickled load_session_data() results, least recently used first. Entries are
+        # dropped when this manager saves the session, and all of them when another
+        # connection commits (PRAGMA data_version changes)
+        self._load_cache = collections.OrderedDict()
+        self._load_cache_data_version = None
+        
+        # Sessions that only exist as files (written by older versions) are copied into the database once
+        with self._db_lock:
+            schema_version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if schema_version < DB_VERSION_FILES_MIGRATED:
+            self.migrate()
+            with self._db_lock:
+                self._conn.execute(f'PRAGMA user_version = {DB_VERSION_FILES_MIGRATED}')
+        
         # If there's an active session, try to load it
         if self.active_session:
             try:
                 session_data = self.load_session_data(self.active_session)
                 if session_data:
-                    self.session_data = session_data
+                    self.session_data = _normalize_session_data(session_data)
+                    self._track_loaded_history(self.active_session)
                     logger.debug(f"Loaded active session: {self.active_session}")
                 else:
                     logger.warning(f"Failed to load active session data: {self.active_session}")
@@ -100,6 +660,10 @@ class SessionManager:
                 logger.warning(f"Error loading active session: {e}")
                 self.active_session = None
     
+    def _path(self, session_id: str, suffix: str = SESSION_FILE_SUFFIX) -> str:
+        """Return the path of a session file with the given suffix."""
+        return self._prefix + session_id + suffix
+    
     def ensure_sessions_dir(self) -> None:
         """Ensure the sessions directory exists."""
         if not os.path.exists(self.sessions_dir):
@@ -109,17 +673,138 @@ class SessionManager:
             except OSError as e:
                 logger.error(f"Failed to create sessions directory: {e}")
                 raise
+        else:
+            self._remove_stale_tmp_files()
+    
+    def _remove_stale_tmp_files(self) -> None:
+        """Remove temporary files left behind by writers that died before renaming them."""
+        try:
+            with os.scandir(self.sessions_dir) as it:
+                for entry in it:
+                    marker = entry.name.rfind(TMP_FILE_MARKER)
+                    if marker == -1:
+                        continue
+                    
+                    # Leave files of live processes alone, they may still be writing
+                    pid = entry.name[marker + len(TMP_FILE_MARKER):].split(".", 1)[0]
+                    if pid.isdigit():
+                        try:
+                            os.kill(int(pid), 0)
+                            continue
+                        except ProcessLookupError:
+                            pass
+                        except OSError:
+                            continue
+                    
+                    try:
+                        os.remove(entry.path)
+                        logger.debug(f"Removed stale temporary file: {entry.name}")
+                    except OSError:
+                        pass
+        except OSError as e:
+            logger.warning(f"Error cleaning up temporary files: {e}")
+    
+    def _bump_version(self) -> None:
+        """Invalidate the cached listing and loaded sessions."""
+        with self._db_lock:
+            self._version += 1
+    
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run the enclosed statements in one immediate transaction on the shared connection."""
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+            # Bumped again after the commit, so a read that overlapped it isn't cached
+            self._version += 1
+            
+            self._writes_since_checkpoint += 1
+            if self._writes_since_checkpoint >= WAL_CHECKPOINT_EVERY:
+                self._writes_since_checkpoint = 0
+                try:
+                    cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                except sqlite3.Error as e:
+                    logger.debug(f"WAL checkpoint failed: {e}")
+    
+    @contextlib.contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection from the pool.
+        
+        Reads on these connections don't take the lock guarding the shared
+        connection, so they run alongside writes and each other. With WAL each
+        statement sees the last committed state.
+        
+        Rows are `sqlite3.Row` objects, accessed by column name. Scans over many
+        history rows use `_tuple_cursor` instead, as building and indexing Row
+        objects costs noticeably more than unpacking tuples.
+        """
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._db_lock:
+                if len(self._read_conns) < DB_READ_POOL_SIZE:
+                    conn = _connect_db(
+                        "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro",
+                        uri=True,
+                        isolation_level=None,
+                        check_same_thread=False,
+                        cached_statements=DB_STATEMENT_CACHE_SIZE
+                    )
+                    conn.create_function("command_match", 2, _command_match, deterministic=True)
+                    conn.row_factory = sqlite3.Row
+                    self._read_conns.append(conn)
+                else:
+                    conn = None
+            if conn is None:
+                conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+    
+    def close(self) -> None:
+        """
+        Flush pending session files, stop the writer thread and close the database connections.
+        
+        Calling close() again is a no-op.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        # None tells the writer thread to exit once everything before it is written
+        self._write_queue.put(None)
+        self._writer.join()
+        atexit.unregister(self.flush)
+        with self._db_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns = []
+            # Refresh the query planner's statistics if they've gone stale
+            try:
+                self._conn.execute('PRAGMA optimize')
+            except sqlite3.Error as e:
+                logger.debug(f"PRAGMA optimize failed: {e}")
+            self._conn.close()
+    
+    def __enter__(self) -> "SessionManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
     
     def get_active_session_id(self) -> Optional[str]:
         """Get the active session ID from the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT session_id FROM active_session ORDER BY id DESC LIMIT 1')
-            result = cursor.fetchone()
-            
-            conn.close()
+            with self._db_lock:
+                result = self._conn.execute(_SQL_GET_ACTIVE).fetchone()
             
             return result[0] if result else None
         except Exception as e:
@@ -129,21 +814,9 @@ class SessionManager:
     def set_active_session_id(self, session_id: Optional[str]) -> bool:
         """Set the active session ID in the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Clear any existing active sessions
-            cursor.execute('DELETE FROM active_session')
-            
-            # If a session ID is provided, set it as active
-            if session_id:
-                cursor.execute(
-                    'INSERT INTO active_session (session_id, timestamp) VALUES (?, ?)',
-                    (session_id, datetime.datetime.now().isoformat())
-                )
-            
-            conn.commit()
-            conn.close()
+            # A single upsert of the one active_session row; NULL means no active session
+            with self._db_lock:
+                self._conn.execute(_SQL_SET_ACTIVE, (session_id or None, _now_iso()))
             
             # Update in-memory state
             self.active_session = session_id
@@ -154,58 +827,40 @@ class SessionManager:
             logger.error(f"Error setting active session ID: {e}")
             return False
     
-    def save_session_to_db(self, session_id: str, session_data: Dict[str, Any]) -> bool:
-        """Save session metadata to the database."""
+    def save_session_to_db(
+        self,
+        session_id: str,
+        session_data: Dict[str, Any],
+        rewrite_history: bool = False
+    ) -> bool:
+        """
+        Save session metadata to the database.
+        
+        History entries live in the session_history table; only entries not yet
+        stored there are inserted, so an append costs one row rather than a
+        rewrite of the whole session.
+        
+        Args:
+            session_id: ID of the session to save
+            session_data: Session data to save
+            rewrite_history: Whether to replace the stored history with session_data's
+                (e.g. after a reset or import)
+        """
+        self._bump_version()
+        if self._batch_depth:
+            # Written once, with the latest data, when the outermost batch exits
+            previous = self._batch_rows.get(session_id)
+            self._batch_rows[session_id] = (
+                session_data, rewrite_history or (previous is not None and previous[1])
+            )
+            return True
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            metadata = session_data.get('metadata', {})
-            
-            # Convert entire session data to JSON for storage
-            session_json = json.dumps(session_data)
-            
-            # Check if session exists
-            cursor.execute('SELECT id FROM sessions WHERE id = ?', (session_id,))
-            if cursor.fetchone():
-                # Update existing session
-                cursor.execute('''
-                UPDATE sessions SET 
-                    name = ?,
-                    description = ?,
-                    project_id = ?,
-                    status = ?,
-                    updated_at = ?,
-                    metadata = ?
-                WHERE id = ?
-                ''', (
-                    metadata.get('name', ''),
-                    metadata.get('description', ''),
-                    metadata.get('project_id', ''),
-                    metadata.get('status', 'active'),
-                    metadata.get('last_activity', datetime.datetime.now().isoformat()),
-                    session_json,
-                    session_id
-                ))
-            else:
-                # Insert new session
-                cursor.execute('''
-                INSERT INTO sessions (
-                    id, name, description, project_id, status, created_at, updated_at, metadata
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    session_id,
-                    metadata.get('name', ''),
-                    metadata.get('description', ''),
-                    metadata.get('project_id', ''),
-                    metadata.get('status', 'active'),
-                    metadata.get('start_time', datetime.datetime.now().isoformat()),
-                    metadata.get('last_activity', datetime.datetime.now().isoformat()),
-                    session_json
-                ))
-            
-            conn.commit()
-            conn.close()
+            with self._transaction() as cursor:
+                history_rows = []
+                row = self._prepare_session_row(cursor, session_id, session_data, rewrite_history, history_rows)
+                cursor.executemany(_SQL_INSERT_HISTORY, history_rows)
+                cursor.execute(_SQL_UPSERT_SESSION, row)
+            self._mark_history_persisted(session_id, session_data)
             
             logger.debug(f"Saved session to database: {session_id}")
             return True
@@ -213,123 +868,511 @@ class SessionManager:
             logger.error(f"Error saving session to database: {e}")
             return False
     
-    def load_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Load session data from the database."""
+    def _prepare_session_row(
+        self,
+        cursor,
+        session_id: str,
+        session_data: Dict[str, Any],
+        rewrite_history: bool,
+        history_rows: List[tuple]
+    ) -> tuple:
+        """
+        Collect the statement parameters for saving a session, without committing.
+        
+        Only the history rows the database doesn't have yet are collected (after
+        deleting the stored ones if rewrite_history is set), so callers can insert
+        the rows of many sessions with one executemany. New entries are those past
+        the count recorded by `_mark_history_persisted` for this history list, and
+        are numbered after the highest stored seq, so rows appended meanwhile by
+        another manager are kept. Lists with no record (e.g. built by the caller)
+        fall back to treating every entry past the highest stored seq as new.
+        
+        Args:
+            cursor: Cursor inside the caller's transaction
+            session_id: ID of the session
+            session_data: Session data to save
+            rewrite_history: Whether to replace the stored history
+            history_rows: List that _SQL_INSERT_HISTORY parameters are appended to
+            
+        Returns:
+            Parameters for _SQL_UPSERT_SESSION, which inserts or updates the session row
+        """
+        self._load_cache.pop(session_id, None)
+        
+        metadata = session_data.get('metadata', {})
+        # Only needed as a fallback for sessions missing their timestamps
+        if 'start_time' in metadata and 'last_activity' in metadata:
+            now_iso = None
+        else:
+            now_iso = _now_iso()
+        
+        # Convert session data to JSON for storage; history is stored row by row
+        session_json = _db_json({k: v for k, v in session_data.items() if k != 'history'})
+        
+        history = session_data.get('history')
+        if history is not None:
+            if rewrite_history:
+                cursor.execute(_SQL_DELETE_HISTORY, (session_id,))
+                next_seq = persisted = 0
+            else:
+                next_seq = cursor.execute(_SQL_NEXT_HISTORY_SEQ, (session_id,)).fetchone()[0]
+                known = self._persisted_history.get(session_id)
+                persisted = known[1] if known is not None and known[0] is history else next_seq
+            history_rows.extend(
+                _history_row(session_id, seq, entry)
+                for seq, entry in enumerate(history[persisted:], next_seq)
+            )
+        
+        return (
+            session_id,
+            metadata.get('name', ''),
+            metadata.get('description', ''),
+            metadata.get('project_id', ''),
+            metadata.get('status', 'active'),
+            metadata.get('start_time', now_iso),
+            metadata.get('last_activity', now_iso),
+            session_json
+        )
+    
+    def _mark_history_persisted(self, session_id: str, session_data: Dict[str, Any], count: Optional[int] = None) -> None:
+        """
+        Record that the first `count` entries of session_data's history list are in the database.
+        
+        Args:
+            session_id: ID of the session
+            session_data: Session data whose history list was saved or loaded
+            count: Number of stored entries; defaults to the whole list
+        """
+        history = session_data.get('history')
+        if history is not None:
+            self._persisted_history[session_id] = (history, len(history) if count is None else count)
+    
+    def _track_loaded_history(self, session_id: str) -> None:
+        """Record how much of the just-loaded active session's history is in the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._reader() as conn:
+                stored = conn.execute(_SQL_COUNT_HISTORY, (session_id,)).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.debug(f"Counting stored history failed: {e}")
+            return
+        # Rows appended after the load are counted but aren't in the list
+        history = self.session_data.get('history', [])
+        self._mark_history_persisted(session_id, self.session_data, min(stored, len(history)))
+    
+    def save_sessions_bulk(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        rewrite_history: bool = False
+    ) -> bool:
+        """
+        Save several sessions to the database in a single transaction.
+        
+        Args:
+            items: (session_id, session_data) pairs
+            rewrite_history: Whether to replace each session's stored history
             
-            cursor.execute('SELECT metadata FROM sessions WHERE id = ?', (session_id,))
-            result = cursor.fetchone()
+        Returns:
+            True if successful, False otherwise
+        """
+        # Same as batch(), but reports whether the transaction committed
+        self._batch_depth += 1
+        try:
+            for session_id, session_data in items:
+                self.save_session_to_db(session_id, session_data, rewrite_history)
+        finally:
+            self._batch_depth -= 1
+            # Inside an enclosing batch the rows are written when it exits
+            ok = self._commit_batch() if not self._batch_depth else True
+        return ok
+    
+    @contextlib.contextmanager
+    def batch(self) -> Iterator["SessionManager"]:
+        """
+        Group several mutations into a single database transaction.
+        
+        Inside the block, database and session file writes are only recorded; when
+        the outermost batch exits, each touched session is written once with its
+        latest data, in one ``BEGIN IMMEDIATE ... COMMIT``. Batches may be nested.
+        
+        If the transaction fails, nothing is written (neither rows nor session
+        files) and RuntimeError is raised, unless the block itself raised.
+        
+        Example:
+            with manager.batch():
+                manager.add_to_history("command", "ls")
+                manager.set_context_value("cwd", "/tmp")
+        
+        Raises:
+            RuntimeError: If the batch couldn't be written to the database
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            ok = self._commit_batch() if not self._batch_depth else True
+        if not ok:
+            raise RuntimeError("Session batch could not be written to the database")
+    
+    def _commit_batch(self) -> bool:
+        """Write the rows and session files recorded during a batch; return False if the transaction failed."""
+        rows, self._batch_rows = self._batch_rows, {}
+        files, self._batch_files = self._batch_files, {}
+        
+        if rows:
+            try:
+                history_rows = []
+                with self._transaction() as cursor:
+                    session_rows = [
+                        self._prepare_session_row(cursor, session_id, session_data, rewrite_history, history_rows)
+                        for session_id, (session_data, rewrite_history) in rows.items()
+                    ]
+                    cursor.executemany(_SQL_INSERT_HISTORY, history_rows)
+                    cursor.executemany(_SQL_UPSERT_SESSION, session_rows)
+                for session_id, (session_data, _) in rows.items():
+                    self._mark_history_persisted(session_id, session_data)
+                logger.debug(f"Saved {len(rows)} session(s) to database in one transaction")
+            except Exception as e:
+                logger.error(f"Error saving session batch to database: {e}")
+                return False
+        
+        # Session files mirror the database, so they are only written once it committed
+        for session_id, (session_data, rewrite_history) in files.items():
+            self._save_session(session_id, session_data, rewrite_history)
+        
+        return True
+    
+    def load_session_data(self, session_id: str, migrate: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Load session data from the database.
+        
+        Args:
+            session_id: ID of the session to load
+            migrate: Whether to copy a session found only in a session file into the
+                database. Callers that save the session right away pass False.
+        """
+        try:
+            with self._db_lock:
+                data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+                if data_version != self._load_cache_data_version:
+                    self._load_cache.clear()
+                    self._load_cache_data_version = data_version
+                cached = self._load_cache.get(session_id)
+                if cached is not None:
+                    self._load_cache.move_to_end(session_id)
+                    # Each caller gets its own copy to mutate
+                    return pickle.loads(cached)
+                
+                # A save between this read and caching its result would leave a stale entry
+                version = self._version
             
-            conn.close()
+            with self._reader() as conn:
+                result = conn.execute(_SQL_SELECT_META, (session_id,)).fetchone()
+                session_json = result["metadata"] if result else None
+                if session_json:
+                    history = [
+                        _history_entry(row)
+                        for row in _tuple_cursor(conn).execute(_SQL_SELECT_HISTORY + ' ORDER BY seq', (session_id,))
+                    ]
             
-            if result and result[0]:
+            if session_json:
                 try:
-                    return json.loads(result[0])
-                except json.JSONDecodeError as e:
+                    session_data = _db_loads(session_json)
+                except ValueError as e:
                     logger.error(f"Error decoding session JSON: {e}")
                     return None
-            
-            # If not in database, try to load from YAML file (for backward compatibility)
-            session_path = os.path.join(self.sessions_dir, f"{session_id}.yaml")
-            if os.path.exists(session_path):
-                with open(session_path, 'r') as f:
-                    yaml_data = yaml.safe_load(f)
+                if "history" not in session_data:
+                    session_data["history"] = history
                 
-                # Save to database for future use
-                self.save_session_to_db(session_id, yaml_data)
+                with self._db_lock:
+                    if self._version == version:
+                        self._load_cache[session_id] = pickle.dumps(session_data, pickle.HIGHEST_PROTOCOL)
+                        if len(self._load_cache) > LOAD_CACHE_SIZE:
+                            self._load_cache.popitem(last=False)
+                return session_data
+            
+            # If not in database, try to load from the session file (for backward compatibility)
+            file_data = self._read_session_file(session_id)
+            if file_data is not None:
+                if migrate:
+                    # Save to database for future use
+                    self.save_session_to_db(session_id, file_data)
                 
-                return yaml_data
+                return file_data
             
             return None
         except Exception as e:
             logger.error(f"Error loading session data: {e}")
             return None
     
-    def list_sessions(self) -> List[Dict[str, Any]]:
+    def _iter_history_rows(
+        self,
+        session_id: str,
+        newest_first: bool = False,
+        command_filter: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Iterate over a session's history rows, or return None if the session isn't in the database.
+        
+        The command filter and limit are both applied by SQLite. ASCII filters
+        first go through a LIKE condition, which matches a superset of the
+        case-insensitive filter without calling back into Python; the exact
+        match is the command_match() function registered on the connection.
+        """
+        sql = _SQL_SELECT_HISTORY
+        params = [session_id]
+        if command_filter:
+            if command_filter.isascii():
+                escaped = command_filter.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                sql += _SQL_HISTORY_COMMAND_FILTER
+                params += ['%' + escaped + '%', _NON_ASCII_GLOB]
+            sql += _SQL_HISTORY_COMMAND_MATCH
+            params.append(command_filter)
+        sql += ' ORDER BY seq DESC' if newest_first else ' ORDER BY seq'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        # Rows are fetched before returning, so the pooled connection is never
+        # held by an iterator the caller might abandon; entries are built lazily
+        with self._reader() as conn:
+            if conn.execute(_SQL_SESSION_EXISTS, (session_id,)).fetchone() is None:
+                return None
+            rows = _tuple_cursor(conn).execute(sql, params).fetchall()
+        
+        return map(_history_entry, rows)
+    
+    def list_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         List all available sessions.
         
+        Args:
+            limit: Optional maximum number of sessions to return. Unless the full
+                listing is cached, only that many rows are read from the database.
+        
         Returns:
-            List of session metadata dictionaries.
+            List of session metadata dictionaries, most recently active first.
         """
+        # Reuse the last listing unless this manager wrote something or another
+        # connection committed since then. With WAL the database file's mtime
+        # lags behind commits, so ask SQLite instead
+        # The cache is read and updated under the lock, as lists may run in several threads
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT id, name, description, project_id, status, created_at, updated_at
-            FROM sessions
-            ORDER BY updated_at DESC
-            ''')
-            
-            sessions = []
-            for row in cursor.fetchall():
-                sessions.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'project_id': row[3],
-                    'status': row[4],
-                    'start_time': row[5],
-                    'last_activity': row[6]
-                })
-            
-            conn.close()
-            
-            # Merge with sessions from YAML files (for backward compatibility)
-            yaml_sessions = self._list_yaml_sessions()
-            
-            # Create a set of IDs from the database
-            db_session_ids = {s['id'] for s in sessions}
-            
-            # Add sessions from YAML files that aren't in the database
-            for session in yaml_sessions:
-                if session['id'] not in db_session_ids:
-                    sessions.append(session)
+            with self._db_lock:
+                data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+                cache_key = (self._version, data_version)
+                if cache_key == self._list_cache_key:
+                    return self._list_cache[:limit]
+        except sqlite3.Error:
+            cache_key = None
+        
+        try:
+            sessions = [dict(row) for row in self.iter_sessions(limit)]
             
-            # Sort by last activity time
-            sessions.sort(key=lambda s: s.get('last_activity', ''), reverse=True)
+            # Calculate session durations where possible
+            _set_durations(sessions)
             
-            return sessions
+            # Only full listings are cached, and only if no write committed while reading
+            if limit is None and cache_key is not None:
+                with self._db_lock:
+                    if self._version == cache_key[0]:
+                        self._list_cache = sessions
+                        self._list_cache_key = cache_key
+            return sessions[:]
         except Exception as e:
             logger.error(f"Error listing sessions: {e}")
             return []
     
-    def _list_yaml_sessions(self) -> List[Dict[str, Any]]:
-        """List sessions from YAML files for backward compatibility."""
-        sessions = []
+    def iter_sessions(self, limit: Optional[int] = None) -> Iterator[sqlite3.Row]:
+        """
+        Iterate over session rows, most recently active first.
         
-        try:
-            for filename in os.listdir(self.sessions_dir):
-                if filename.endswith(".yaml") or filename.endswith(".yml"):
-                    session_id = filename.rsplit(".", 1)[0]
-                    session_path = os.path.join(self.sessions_dir, filename)
-                    
-                    try:
-                        with open(session_path, 'r') as f:
-                            session_data = yaml.safe_load(f)
-                            
-                        # Add session ID to metadata
-                        session_meta = session_data.get("metadata", {})
-                        session_meta["id"] = session_id
-                        
-                        # Calculate session duration if possible
-                        if "start_time" in session_meta and "last_activity" in session_meta:
-                            start = datetime.datetime.fromisoformat(session_meta["start_time"])
-                            last = datetime.datetime.fromisoformat(session_meta["last_activity"])
-                            duration = last - start
-                            session_meta["duration"] = str(duration)
-                        
-                        sessions.append(session_meta)
-                    except Exception as e:
-                        logger.warning(f"Error reading session file {filename}: {e}")
+        Rows are sorted by SQLite (using the updated_at index) and fetched on a
+        pooled read-only connection, which is returned before this method does.
+        They are `sqlite3.Row` objects, which support access by key
+        (id, name, description, project_id, status, start_time, last_activity)
+        without building a dict per row; use `dict(row)` where one is needed.
+        Unlike `list_sessions()`, no durations are computed.
+        
+        Args:
+            limit: Optional maximum number of sessions to return
             
-            return sessions
-        except Exception as e:
-            logger.error(f"Error listing YAML sessions: {e}")
-            return []
+        Returns:
+            Iterator over session rows
+        """
+        sql = _SQL_LIST_SESSIONS
+        params = ()
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params = (limit,)
+        with self._reader() as conn:
+            return iter(conn.execute(sql, params).fetchall())
+    
+    def migrate(self) -> int:
+        """
+        Copy sessions that only exist as session files into the database.
+        
+        Runs automatically once per database; call it again after copying session
+        files (JSON or legacy YAML) into the sessions directory by hand.
+        
+        Returns:
+            Number of sessions copied
+        """
+        # Make sure queued writes are on disk before scanning
+        self._write_queue.join()
+        
+        try:
+            session_ids = self._scan_session_dir()
+            with self._db_lock:
+                known = {row[0] for row in self._conn.execute('SELECT id FROM sessions')}
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error scanning session files: {e}")
+            return 0
+        
+        missing = [session_id for session_id in session_ids if session_id not in known]
+        if not missing:
+            return 0
+        
+        def parse(session_id):
+            try:
+                return self._parse_session_file(session_id)
+            except Exception as e:
+                logger.warning(f"Error reading session {session_id}: {e}")
+                return None, False
+        
+        # Reading and parsing run in parallel, so disk reads overlap; saving stays on this thread
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(MIGRATE_WORKERS, len(missing))) as executor:
+            parsed = list(executor.map(parse, missing))
+        
+        migrated = 0
+        try:
+            with self.batch():
+                for session_id, (session_data, legacy) in zip(missing, parsed):
+                    if not isinstance(session_data, dict):
+                        continue
+                    if legacy:
+                        self._convert_legacy_session(session_id, session_data)
+                    self.save_session_to_db(session_id, session_data)
+                    migrated += 1
+        except RuntimeError as e:
+            logger.error(f"Error migrating session files: {e}")
+            return 0
+        
+        if migrated:
+            logger.info(f"Migrated {migrated} session file(s) into the database")
+        return migrated
+    
+    def _session_exists(self, session_id: str) -> bool:
+        """
+        Check whether a session exists without loading it.
+        
+        Sessions saved inside a batch that hasn't been committed yet count as
+        existing, as do sessions in the database or as session files.
+        """
+        if session_id in self._batch_rows or session_id in self._batch_files:
+            return True
+        with self._reader() as conn:
+            if conn.execute(_SQL_SESSION_EXISTS, (session_id,)).fetchone() is not None:
+                return True
+        return any(
+            os.path.exists(self._path(session_id, suffix))
+            for suffix in (SESSION_FILE_SUFFIX, COMPRESSED_SESSION_SUFFIX) + LEGACY_SESSION_SUFFIXES
+        )
+    
+    def _scan_session_dir(self) -> List[str]:
+        """Collect the IDs of all session files in a single directory pass."""
+        session_ids = []
+        
+        with os.scandir(self.sessions_dir) as it:
+            for entry in it:
+                filename = entry.name
+                if filename.endswith(META_SIDECAR_SUFFIX):
+                    continue
+                elif filename.endswith(COMPRESSED_SESSION_SUFFIX):
+                    if entry.is_file():
+                        session_ids.append(filename[:-len(COMPRESSED_SESSION_SUFFIX)])
+                elif filename.endswith((SESSION_FILE_SUFFIX,) + LEGACY_SESSION_SUFFIXES):
+                    if entry.is_file():
+                        session_ids.append(filename.rsplit(".", 1)[0])
+        
+        return list(dict.fromkeys(session_ids))
+    
+    def _read_session_file(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a session file and its history log.
+        
+        Returns:
+            Session data, or None if no session file exists
+        """
+        self._write_queue.join()
+        session_data, legacy = self._parse_session_file(session_id)
+        if legacy and isinstance(session_data, dict):
+            self._convert_legacy_session(session_id, session_data)
+        return session_data
+    
+    def _parse_session_file(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Read a session file and its history log without side effects, so it can run in any thread.
+        
+        Returns:
+            Tuple of (session data or None if no session file exists, whether it was legacy YAML)
+        """
+        session_data, legacy = self._parse_session_document(session_id)
+        if session_data is not None:
+            history = self._iter_history_log(session_id)
+            if history is not None:
+                session_data["history"] = list(history)
+        return session_data, legacy
+    
+    def _read_session_document(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a session file, preferring JSON (plain or zstd-compressed) and falling back to legacy YAML.
+        
+        Returns:
+            Session data, or None if no session file exists
+        """
+        session_data, legacy = self._parse_session_document(session_id)
+        if legacy and isinstance(session_data, dict):
+            self._convert_legacy_session(session_id, session_data)
+        return session_data
+    
+    def _parse_session_document(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Parse a session file without side effects.
+        
+        Returns:
+            Tuple of (session data or None if no session file exists, whether it was legacy YAML)
+        """
+        session_path = self._path(session_id)
+        try:
+            return _read_json_file(session_path), False
+        except FileNotFoundError:
+            pass
+        
+        session_path = self._path(session_id, COMPRESSED_SESSION_SUFFIX)
+        try:
+            data = _read_small_file(session_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if zstandard is None:
+                raise RuntimeError(f"zstandard is required to read {session_path}")
+            return _json_loads(zstandard.decompress(data)), False
+        
+        for suffix in LEGACY_SESSION_SUFFIXES:
+            session_path = self._path(session_id, suffix)
+            try:
+                with open(session_path, 'r') as f:
+                    return _yaml_safe_load(f), True
+            except FileNotFoundError:
+                continue
+        
+        return None, False
+    
+    def _convert_legacy_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        """Write a JSON copy next to a legacy YAML session file, so later reads never parse YAML again."""
+        self._save_session(session_id, session_data, rewrite_history=True, force=True)
     
     def create_session(
         self,
@@ -352,12 +1395,16 @@ class SessionManager:
         Returns:
             Session metadata dictionary
         """
+        # Persist pending changes of the previously active session
+        self.flush()
+        
+        now = datetime.datetime.now()
+        now_iso = now.isoformat()
+        
         # Generate session ID if not provided
         if session_id is None:
-            # Use a combination of timestamp and UUID to ensure uniqueness
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            random_suffix = uuid.uuid4().hex[:6]
-            session_id = f"session-{timestamp}-{random_suffix}"
+            # Use a combination of timestamp and random suffix to ensure uniqueness
+            session_id = _new_session_id(now)
         
         # Create session metadata
         metadata = {
@@ -365,8 +1412,8 @@ class SessionManager:
             "description": description or "",
             "project_id": project_id,
             "tags": tags or [],
-            "start_time": datetime.datetime.now().isoformat(),
-            "last_activity": datetime.datetime.now().isoformat(),
+            "start_time": now_iso,
+            "last_activity": now_iso,
             "status": "active"
         }
         
@@ -377,10 +1424,7 @@ class SessionManager:
             "context": {
                 "current_project": project_id,
                 "current_directory": os.getcwd(),
-                "environment": {
-                    "python_version": sys.version,
-                    "platform": sys.platform
-                }
+                "environment": dict(_ENV_BLOCK)
             },
             "state": {
                 "last_command": None,
@@ -389,11 +1433,8 @@ class SessionManager:
             }
         }
         
-        # Save session data
-        self._save_session(session_id)
-        
-        # Save to database
-        self.save_session_to_db(session_id, self.session_data)
+        # Save to the database and session file
+        self._persist(session_id, sync_files=True, rewrite_history=True)
         
         # Set as active session
         self.set_active_session_id(session_id)
@@ -411,6 +1452,9 @@ class SessionManager:
         Returns:
             Session metadata if successful, None otherwise
         """
+        # Persist pending changes of the previously active session
+        self.flush()
+        
         # Load session data
         session_data = self.load_session_data(session_id)
         
@@ -419,18 +1463,16 @@ class SessionManager:
             return None
         
         # Update session data
-        self.session_data = session_data
+        self.session_data = _normalize_session_data(session_data)
+        self._track_loaded_history(session_id)
         
         # Update last activity time
         if "metadata" in self.session_data:
-            self.session_data["metadata"]["last_activity"] = datetime.datetime.now().isoformat()
+            self.session_data["metadata"]["last_activity"] = _now_iso()
             self.session_data["metadata"]["status"] = "active"
         
         # Save updated session data
-        self._save_session(session_id)
-        
-        # Save to database
-        self.save_session_to_db(session_id, self.session_data)
+        self._persist(session_id)
         
         # Set as active session
         self.set_active_session_id(session_id)
@@ -454,7 +1496,8 @@ class SessionManager:
                 session_data = self.load_session_data(session_id)
                 if session_data:
                     self.active_session = session_id
-                    self.session_data = session_data
+                    self.session_data = _normalize_session_data(session_data)
+                    self._track_loaded_history(session_id)
                 else:
                     return None
             else:
@@ -462,6 +1505,34 @@ class SessionManager:
         
         return {**self.session_data.get("metadata", {}), "id": self.active_session}
     
+    def _get_session(self, session_id: str, migrate: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return a session's data: the in-memory data for the loaded active session, else a fresh load.
+        
+        Args:
+            session_id: ID of the session
+            migrate: Passed on to `load_session_data`
+            
+        Returns:
+            Session data, or None (logged) if the session doesn't exist
+        """
+        if session_id == self.active_session and self.session_data:
+            return self.session_data
+        session_data = self.load_session_data(session_id, migrate=migrate)
+        if not session_data:
+            logger.error(f"Session not found: {session_id}")
+            return None
+        return session_data
+    
+    def _require_active_session(self) -> bool:
+        """
+        Check that a session is active and loaded, without touching the database.
+        
+        Mutators use this instead of `get_active_session()`, which copies the
+        metadata and, with no session loaded, queries the database on every call.
+        """
+        return bool(self.active_session and self.session_data)
+    
     def close_session(self, session_id: Optional[str] = None) -> bool:
         """
         Close a session, marking it as completed.
@@ -479,36 +1550,25 @@ class SessionManager:
                 return False
             session_id = self.active_session
         
-        # Load session data if not already loaded or different from active session
-        if session_id != self.active_session or not self.session_data:
-            session_data = self.load_session_data(session_id)
-            if not session_data:
-                logger.error(f"Session not found: {session_id}")
-                return False
-        else:
-            session_data = self.session_data
+        # It is saved below, so a file-only session needn't be copied to the database first
+        session_data = self._get_session(session_id, migrate=False)
+        if not session_data:
+            return False
         
         # Update session metadata
         if "metadata" in session_data:
+            now = datetime.datetime.now()
             session_data["metadata"]["status"] = "completed"
-            session_data["metadata"]["end_time"] = datetime.datetime.now().isoformat()
+            session_data["metadata"]["end_time"] = now.isoformat()
             
             # Calculate duration
             if "start_time" in session_data["metadata"]:
-                start = datetime.datetime.fromisoformat(session_data["metadata"]["start_time"])
-                end = datetime.datetime.fromisoformat(session_data["metadata"]["end_time"])
-                duration = end - start
+                start = _fromiso(session_data["metadata"]["start_time"])
+                duration = now - start
                 session_data["metadata"]["duration"] = str(duration)
         
-        # Save updated session data
-        if session_id == self.active_session:
-            self.session_data = session_data
-        
-        # Save to YAML file
-        self._save_session(session_id)
-        
-        # Save to database
-        self.save_session_to_db(session_id, session_data)
+        # Save to the database and session file
+        self._persist(session_id, session_data, sync_files=True)
         
         # If closing the active session, clear it
         if session_id == self.active_session:
@@ -539,16 +1599,16 @@ class SessionManager:
                 True if successful, False otherwise
             """
             # Check if we have an active session
-            active_session = self.get_active_session()
-            if not active_session:
+            if not self._require_active_session():
                 logger.warning("No active session to add history to")
                 return False
             
             # Get session creation time and convert to datetime object
             session_creation_time = None
+            metadata = self.session_data.get("metadata", {})
             try:
-                if "start_time" in active_session:
-                    session_creation_time = datetime.datetime.fromisoformat(active_session["start_time"])
+                if "start_time" in metadata:
+                    session_creation_time = _fromiso(metadata["start_time"])
             except (ValueError, TypeError) as e:
                 logger.warning(f"Invalid session start time format: {e}")
             
@@ -559,9 +1619,11 @@ class SessionManager:
             # Skip commands that occurred before the session was created
             if session_creation_time is None or current_time >= session_creation_time:
                 try:
+                    current_iso = current_time.isoformat()
+                    
                     # Create history entry
                     entry = {
-                        "timestamp": current_time.isoformat(),
+                        "timestamp": current_iso,
                         "command": command,
                         "args": args or {},
                         "working_directory": os.getcwd()
@@ -573,9 +1635,8 @@ class SessionManager:
                     if error is not None:
                         entry["error"] = error
                     
-                    # Add to history
-                    if "history" not in self.session_data:
-                        self.session_data["history"] = []
+                    history = self.session_data["history"]
+                    state = self.session_data["state"]
                     
                     # Check for duplicate entries - don't add the same command multiple times
                     # This prevents issues with command recording during session creation
@@ -586,7 +1647,7 @@ class SessionManager:
                         
                     # Filter out commands that match this exact command and arguments (to avoid duplicates)
                     existing_entries = [
-                        h for h in self.session_data["history"]
+                        h for h in history
                         if h.get("command") == command and h.get("args") == args
                     ]
                     
@@ -595,23 +1656,20 @@ class SessionManager:
                         return True
                     
                     # Add the entry
-                    self.session_data["history"].append(entry)
+                    history.append(entry)
                     
                     # Update state
-                    if "state" not in self.session_data:
-                        self.session_data["state"] = {}
-                    
-                    self.session_data["state"]["last_command"] = command
+                    state["last_command"] = command
                     
                     if result is not None:
-                        self.session_data["state"]["last_result"] = result
+                        state["last_result"] = result
                     
                     # Update last activity time
                     if "metadata" in self.session_data:
-                        self.session_data["metadata"]["last_activity"] = current_time.isoformat()
+                        self.session_data["metadata"]["last_activity"] = current_iso
                     
-                    # Save session data
-                    self._save_session(self.active_session)
+                    # Append to the history log; the main session file is flushed periodically
+                    self._append_history_log(self.active_session, entry)
                     
                     # Save to database
                     self.save_session_to_db(self.active_session, self.session_data)
@@ -625,6 +1683,50 @@ class SessionManager:
                 logger.debug(f"Command '{command}' executed before session creation - not adding to history")
                 return False
     
+    def append_history(self, session_id: str, entry: Dict[str, Any]) -> bool:
+        """
+        Append a prepared history entry to any session's history.
+        
+        Unlike `add_to_history`, this works on sessions other than the active one
+        and stores the entry as is: no duplicate check, and the session's state
+        and last activity are left alone. Only the new history row is written.
+        
+        Args:
+            session_id: ID of the session
+            entry: History entry (timestamp, command, args, ...)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if session_id == self.active_session and self.session_data:
+            self.session_data["history"].append(entry)
+            self._append_history_log(session_id, entry)
+            return self.save_session_to_db(session_id, self.session_data)
+        
+        pending = self._batch_rows.get(session_id)
+        if pending is not None:
+            # The batch writes this session's history rows from its pending data
+            pending[0].setdefault("history", []).append(entry)
+            return True
+        
+        self._bump_version()
+        try:
+            with self._transaction() as cursor:
+                if cursor.execute(_SQL_SESSION_EXISTS, (session_id,)).fetchone() is None:
+                    logger.error(f"Session not found: {session_id}")
+                    return False
+                seq = cursor.execute(_SQL_NEXT_HISTORY_SEQ, (session_id,)).fetchone()[0]
+                cursor.execute(_SQL_INSERT_HISTORY, _history_row(session_id, seq, entry))
+                self._load_cache.pop(session_id, None)
+        except Exception as e:
+            logger.error(f"Error appending to session history: {e}")
+            return False
+        
+        # Sessions without a history log get a full one the next time their file is saved
+        if self._has_history_log(session_id):
+            self._write_queue.put(("append", session_id, entry))
+        return True
+    
     def set_context_value(self, key: str, value: Any) -> bool:
         """
         Set a value in the session context.
@@ -637,26 +1739,19 @@ class SessionManager:
             True if successful, False otherwise
         """
         # Check if we have an active session
-        if not self.get_active_session():
+        if not self._require_active_session():
             logger.warning("No active session to set context in")
             return False
         
-        # Ensure context exists
-        if "context" not in self.session_data:
-            self.session_data["context"] = {}
-        
         # Set context value
         self.session_data["context"][key] = value
         
         # Update last activity time
         if "metadata" in self.session_data:
-            self.session_data["metadata"]["last_activity"] = datetime.datetime.now().isoformat()
+            self.session_data["metadata"]["last_activity"] = _now_iso()
         
         # Save session data
-        self._save_session(self.active_session)
-        
-        # Save to database
-        self.save_session_to_db(self.active_session, self.session_data)
+        self._persist(self.active_session)
         
         return True
     
@@ -692,30 +1787,19 @@ class SessionManager:
             True if successful, False otherwise
         """
         # Check if we have an active session
-        if not self.get_active_session():
+        if not self._require_active_session():
             logger.warning("No active session to set state in")
             return False
         
-        # Ensure state exists
-        if "state" not in self.session_data:
-            self.session_data["state"] = {}
-        
-        # Ensure variables dictionary exists
-        if "variables" not in self.session_data["state"]:
-            self.session_data["state"]["variables"] = {}
-        
         # Set variable
         self.session_data["state"]["variables"][name] = value
         
         # Update last activity time
         if "metadata" in self.session_data:
-            self.session_data["metadata"]["last_activity"] = datetime.datetime.now().isoformat()
+            self.session_data["metadata"]["last_activity"] = _now_iso()
         
         # Save session data
-        self._save_session(self.active_session)
-        
-        # Save to database
-        self.save_session_to_db(self.active_session, self.session_data)
+        self._persist(self.active_session)
         
         return True
     
@@ -757,37 +1841,84 @@ class SessionManager:
         Returns:
             List of history entries
         """
+        return list(self.iter_session_history(session_id, limit, command_filter))
+    
+    def iter_session_history(
+        self,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        command_filter: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the command history for a session in chronological order.
+        
+        Without a limit, entries are streamed from the history log as they are
+        read; with one, only the last `limit` matching entries are held in memory.
+        
+        Args:
+            session_id: ID of the session to get history for. If None, uses active session.
+            limit: Optional maximum number of history entries to return
+            command_filter: Optional filter to only include commands containing this string
+            
+        Returns:
+            Iterator over history entries
+        """
         # If no session ID provided, use the active session
         if session_id is None:
             if not self.get_active_session():
                 logger.warning("No active session to get history from")
-                return []
+                return iter(())
             session_id = self.active_session
         
+        # With a limit, walk the history newest-first and stop after `limit` matches
+        newest_first = bool(limit and limit > 0)
+        
         # Load session data if not already loaded or different from active session
         if session_id != self.active_session or not self.session_data:
-            session_data = self.load_session_data(session_id)
-            if not session_data:
-                logger.error(f"Session not found: {session_id}")
-                return []
+            # Read the history rows from the database, which applies the filter and limit
+            history = self._iter_history_rows(session_id, newest_first, command_filter, limit)
+            if history is not None:
+                if newest_first:
+                    entries = list(history)
+                    entries.reverse()
+                    return iter(entries)
+                return history
+            
+            # Otherwise stream the history log of a session that only exists as files;
+            # log lines that can't match the command filter are skipped before parsing
+            line_filter = _compile_line_filter(command_filter) if command_filter else None
+            if newest_first:
+                history = self._iter_history_log_reversed(session_id, line_filter)
+            else:
+                history = self._iter_history_log(session_id, line_filter)
+            if history is None:
+                session_data = self.load_session_data(session_id)
+                if not session_data:
+                    logger.error(f"Session not found: {session_id}")
+                    return iter(())
+                history = session_data.get("history", [])
+                if newest_first:
+                    history = reversed(history)
         else:
-            session_data = self.session_data
-        
-        # Get history
-        history = session_data.get("history", [])
+            history = self.session_data.get("history", [])
+            if newest_first:
+                history = reversed(history)
         
         # Apply command filter if provided
         if command_filter:
-            history = [
+            search = _compile_command_filter(command_filter).search
+            history = (
                 entry for entry in history
-                if command_filter.lower() in entry.get("command", "").lower()
-            ]
+                if search(entry.get("command", ""))
+            )
         
-        # Apply limit if provided
-        if limit and limit > 0:
-            history = history[-limit:]
+        # Apply limit if provided, returning the last `limit` entries in chronological order
+        if newest_first:
+            entries = list(itertools.islice(history, limit))
+            entries.reverse()
+            return iter(entries)
         
-        return history
+        return iter(history)
     
     def export_session(
         self,
@@ -812,14 +1943,12 @@ class SessionManager:
                 return None
             session_id = active_session["id"]
         
-        # Load session data if not already loaded or different from active session
-        if session_id != self.active_session or not self.session_data:
-            session_data = self.load_session_data(session_id)
-            if not session_data:
-                logger.error(f"Session not found: {session_id}")
-                return None
-        else:
-            session_data = self.session_data
+        session_data = self._get_session(session_id)
+        if not session_data:
+            return None
+        if session_data is self.session_data:
+            # Bring the session files up to date with the exported snapshot
+            self.flush()
         
         # Determine output file
         if output_file is None:
@@ -832,8 +1961,8 @@ class SessionManager:
         
         # Export to JSON
         try:
-            with open(output_file, 'w') as f:
-                json.dump(export_data, f, indent=2)
+            _atomic_write(output_file, _json_dumps(export_data, indent=True))
+            _fsync_dir(os.path.dirname(os.path.abspath(output_file)))
             
             logger.info(f"Exported session to: {output_file}")
             return output_file
@@ -864,42 +1993,38 @@ class SessionManager:
                 if input_file.endswith(".json"):
                     session_data = json.load(f)
                 elif input_file.endswith(".yaml") or input_file.endswith(".yml"):
-                    session_data = yaml.safe_load(f)
+                    session_data = _yaml_safe_load(f)
                 else:
                     logger.error(f"Unsupported file format: {input_file}")
                     return None
             
+            # One clock read serves both the generated ID and the import time
+            now = datetime.datetime.now()
+            
             # Extract or generate session ID
             if session_id is None:
                 if "metadata" in session_data and "id" in session_data["metadata"]:
                     session_id = session_data["metadata"]["id"]
                 else:
                     # Generate new session ID
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-                    random_suffix = uuid.uuid4().hex[:6]
-                    session_id = f"session-{timestamp}-{random_suffix}"
+                    session_id = _new_session_id(now)
             
             # Check if session already exists
-            existing_session = self.load_session_data(session_id)
-            if existing_session and not overwrite:
+            if not overwrite and self._session_exists(session_id):
                 logger.error(f"Session already exists: {session_id}")
                 return None
             
             # Update metadata
             if "metadata" in session_data:
                 session_data["metadata"]["imported_from"] = input_file
-                session_data["metadata"]["import_time"] = datetime.datetime.now().isoformat()
+                session_data["metadata"]["import_time"] = now.isoformat()
                 
                 # Remove id from metadata if present to avoid confusion
                 if "id" in session_data["metadata"]:
                     del session_data["metadata"]["id"]
             
-            # Save session data
-            self.session_data = session_data
-            self._save_session(session_id)
-            
-            # Save to database
-            self.save_session_to_db(session_id, session_data)
+            # Save session data (the imported session does not become active)
+            self._persist(session_id, session_data, rewrite_history=True)
             
             logger.info(f"Imported session as: {session_id}")
             
@@ -920,27 +2045,26 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
-        # If no session ID provided, use the active session
-        active_session = self.get_active_session()
+        # If no session ID provided, use the active session. With an explicit ID the
+        # active session doesn't matter, so it isn't looked up (or loaded) at all
         if session_id is None:
+            active_session = self.get_active_session()
             if not active_session:
                 logger.error("No active session to reset")
                 return False
             session_id = active_session["id"]
         
-        # Load session data if not already loaded or different from active session
-        if session_id != self.active_session or not self.session_data:
-            session_data = self.load_session_data(session_id)
-            if not session_data:
-                logger.error(f"Session not found: {session_id}")
-                return False
-        else:
-            session_data = self.session_data
+        # The active session is reset in memory; others are loaded without copying a
+        # file-only session to the database first, since it is saved below anyway
+        session_data = self._get_session(session_id, migrate=False)
+        if not session_data:
+            return False
         
         # Keep metadata but reset history and state
         metadata = session_data.get("metadata", {})
-        metadata["reset_time"] = datetime.datetime.now().isoformat()
-        metadata["last_activity"] = datetime.datetime.now().isoformat()
+        now_iso = _now_iso()
+        metadata["reset_time"] = now_iso
+        metadata["last_activity"] = now_iso
         
         # Keep context but clear history and state
         context = session_data.get("context", {})
@@ -959,11 +2083,8 @@ class SessionManager:
         if session_id == self.active_session:
             self.session_data = reset_data
         
-        # Save to YAML file
-        self._save_session(session_id)
-        
-        # Save to database
-        self.save_session_to_db(session_id, reset_data)
+        # Save to the database and session file
+        self._persist(session_id, reset_data, rewrite_history=True)
         
         logger.info(f"Reset session: {session_id}")
         return True
@@ -978,20 +2099,22 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
+        self._bump_version()
         try:
             # Delete from database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
-            
-            conn.commit()
-            conn.close()
+            with self._transaction() as cursor:
+                cursor.execute(_SQL_DELETE_SESSION, (session_id,))
+                cursor.execute(_SQL_DELETE_HISTORY, (session_id,))
+                self._load_cache.pop(session_id, None)
+            self._persisted_history.pop(session_id, None)
             
-            # Delete YAML file if it exists
-            session_path = os.path.join(self.sessions_dir, f"{session_id}.yaml")
-            if os.path.exists(session_path):
-                os.remove(session_path)
+            # Delete session files and metadata sidecar if they exist, after queued writes land
+            self._write_queue.join()
+            self._history_logs.discard(session_id)
+            for suffix in (SESSION_FILE_SUFFIX, COMPRESSED_SESSION_SUFFIX, META_SIDECAR_SUFFIX, HISTORY_LOG_SUFFIX) + LEGACY_SESSION_SUFFIXES:
+                session_path = self._path(session_id, suffix)
+                if os.path.exists(session_path):
+                    os.remove(session_path)
             
             logger.info(f"Deleted session: {session_id}")
             
@@ -1005,212 +2128,825 @@ class SessionManager:
             logger.error(f"Error deleting session: {e}")
             return False
     
-    def _save_session(self, session_id: str) -> bool:
+    def _persist(
+        self,
+        session_id: str,
+        session_data: Optional[Dict[str, Any]] = None,
+        *,
+        sync_files: bool = False,
+        rewrite_history: bool = False
+    ) -> bool:
         """
-        Save the current session data to a YAML file.
+        Save a session to the database and queue its session file.
+        
+        The database row is always written. The file write is debounced like any
+        `_save_session` call unless sync_files is set.
         
         Args:
             session_id: ID of the session to save
+            session_data: Data to save. If None, saves the current session data.
+            sync_files: Whether to queue the file write even if one was queued just before
+            rewrite_history: Whether to replace the stored history with session_data's
             
         Returns:
-            True if successful, False otherwise
+            True if the database write succeeded
+        """
+        if session_data is None:
+            session_data = self.session_data
+        saved = self.save_session_to_db(session_id, session_data, rewrite_history)
+        self._save_session(session_id, session_data, rewrite_history, force=sync_files)
+        return saved
+    
+    def _save_session(
+        self,
+        session_id: str,
+        session_data: Optional[Dict[str, Any]] = None,
+        rewrite_history: bool = False,
+        force: bool = False
+    ) -> bool:
         """
-        session_path = os.path.join(self.sessions_dir, f"{session_id}.yaml")
+        Queue session data to be written to its JSON file.
         
-        try:
-            with open(session_path, 'w') as f:
-                yaml.dump(self.session_data, f, default_flow_style=False)
+        The write itself happens on the background writer thread, so session files
+        are eventually persisted; call `flush()` when they must be on disk.
+        History is kept in a separate append-only log (`<id>.hist.jsonl`) and is
+        not part of the main file. The log is only rewritten when requested
+        (e.g. after a reset or import) or when it doesn't exist yet.
+        
+        The database is the primary store, so saves of the active session are
+        debounced: within SESSION_FILE_DEBOUNCE seconds of the last write the
+        session is only marked dirty, and `flush()` writes it.
+        
+        Args:
+            session_id: ID of the session to save
+            session_data: Data to save. If None, saves the current session data.
+            rewrite_history: Whether to rewrite the history log from session_data
+            force: Whether to queue the write even if one was queued just before
             
-            logger.debug(f"Saved session to YAML: {session_id}")
+        Returns:
+            True if the write was queued or deferred
+        """
+        if session_data is None:
+            session_data = self.session_data
+        
+        self._bump_version()
+        
+        is_active = session_id == self.active_session
+        now = time.monotonic()
+        if (is_active and not (force or rewrite_history or self._batch_depth)
+                and now - self._last_file_save < SESSION_FILE_DEBOUNCE):
+            if self._dirty_since is None:
+                self._dirty_since = now
             return True
-        except Exception as e:
-            logger.error(f"Error saving session to YAML: {e}")
-            return False
+        
+        if self._batch_depth:
+            previous = self._batch_files.get(session_id)
+            self._batch_files[session_id] = (
+                session_data, rewrite_history or (previous is not None and previous[1])
+            )
+            return True
+        
+        if rewrite_history or not self._has_history_log(session_id):
+            # History entries are never mutated once added, so a list copy is a stable snapshot
+            self._write_queue.put(("history", session_id, list(session_data.get("history", []))))
+            self._history_logs.add(session_id)
+        
+        # Snapshot the document in one C-level pickle pass, so later in-place
+        # mutations of context/state can't leak into (or race with) the queued write
+        document = {k: v for k, v in session_data.items() if k != "history"}
+        self._write_queue.put(("document", session_id, pickle.dumps(document, pickle.HIGHEST_PROTOCOL)))
+        
+        if is_active:
+            self._pending_appends = 0
+            self._dirty_since = None
+            self._last_file_save = now
+        
+        return True
+    
+    def _has_history_log(self, session_id: str) -> bool:
+        """Check whether a session has a history log, counting logs still queued for writing."""
+        if session_id in self._history_logs:
+            return True
+        if os.path.exists(self._path(session_id, HISTORY_LOG_SUFFIX)):
+            self._history_logs.add(session_id)
+            return True
+        return False
+    
+    def _write_document(self, session_id: str, snapshot: bytes) -> None:
+        """Write a pickled session document (without history)."""
+        document = pickle.loads(snapshot)
+        data = _json_dumps(document)
+        
+        # Large documents are stored compressed; remove the other variant so only one exists
+        if self._zstd_compressor is not None and len(data) > COMPRESS_MIN_BYTES:
+            _atomic_write(self._path(session_id, COMPRESSED_SESSION_SUFFIX), self._zstd_compressor.compress(data))
+            stale_path = self._path(session_id)
+        else:
+            _atomic_write(self._path(session_id), data)
+            stale_path = self._path(session_id, COMPRESSED_SESSION_SUFFIX)
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+        
+        logger.debug(f"Saved session file: {session_id}")
+    
+    def _write_history_log(self, session_id: str, history: List[Dict[str, Any]]) -> None:
+        """Replace the history log of a session with the given entries."""
+        log_path = self._path(session_id, HISTORY_LOG_SUFFIX)
+        _atomic_write(log_path, b"".join(map(_json_dumps_line, history)))
+    
+    def _write_history_entries(self, session_id: str, entries: List[Dict[str, Any]]) -> None:
+        """Append entries to the history log of a session in a single write."""
+        _write_all(self._path(session_id, HISTORY_LOG_SUFFIX), b"".join(map(_json_dumps_line, entries)), 'ab', fsync=True)
+    
+    def _append_history_log(self, session_id: str, entry: Dict[str, Any]) -> None:
+        """
+        Append a history entry to the session's log and flush the main file if due.
+        
+        Appending costs O(entry) instead of rewriting the whole session file.
+        """
+        if not self._has_history_log(session_id):
+            # Sessions written before the log existed: write the full history once
+            self._save_session(session_id)
+            return
+        
+        self._write_queue.put(("append", session_id, entry))
+        
+        self._pending_appends += 1
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        if (self._pending_appends >= HISTORY_FLUSH_EVERY
+                or time.monotonic() - self._dirty_since >= HISTORY_FLUSH_INTERVAL):
+            self._save_session(session_id)
+    
+    def _writer_loop(self) -> None:
+        """
+        Write queued session data to disk.
+        
+        Everything queued since the last pass is drained at once. Documents are
+        coalesced per session so only the latest one is written. History appends
+        are collected per session and written with one open/write/close, before
+        any rewrite of that session's log, so history stays in queue order.
+        The sessions directory is synced once per pass, making all of the pass's
+        renames durable together.
+        """
+        writers = {
+            "document": self._write_document,
+            "history": self._write_history_log,
+        }
+        
+        def write_appends(session_id, appends):
+            entries = appends.pop(session_id, None)
+            if not entries:
+                return
+            try:
+                self._write_history_entries(session_id, entries)
+            except Exception as e:
+                logger.error(f"Error saving session file: {e}")
+            finally:
+                for _ in entries:
+                    self._write_queue.task_done()
+        
+        stop = False
+        while not stop:
+            batch = [self._write_queue.get()]
+            while True:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # close() queues None as the last item; write what came before it, then exit
+            if None in batch:
+                stop = True
+                batch = [item for item in batch if item is not None]
+                self._write_queue.task_done()
+            
+            latest_document = {}
+            for index, (kind, session_id, _) in enumerate(batch):
+                if kind == "document":
+                    latest_document[session_id] = index
+            
+            appends = {}
+            for index, (kind, session_id, payload) in enumerate(batch):
+                if kind == "append":
+                    appends.setdefault(session_id, []).append(payload)
+                    continue
+                if kind == "history":
+                    write_appends(session_id, appends)
+                try:
+                    if kind != "document" or latest_document[session_id] == index:
+                        writers[kind](session_id, payload)
+                except Exception as e:
+                    logger.error(f"Error saving session file: {e}")
+                finally:
+                    self._write_queue.task_done()
+            
+            for session_id in list(appends):
+                write_appends(session_id, appends)
+            
+            if latest_document or any(kind == "history" for kind, _, _ in batch):
+                _fsync_dir(self.sessions_dir)
+    
+    def _iter_history_log(self, session_id: str, line_filter: Optional[Callable[[bytes], Any]] = None):
+        """
+        Iterate over the entries in a session's history log.
+        
+        Args:
+            session_id: ID of the session
+            line_filter: Optional predicate on raw log lines; lines it rejects aren't parsed
+        
+        Returns:
+            Generator of history entries, or None if the session has no log
+        """
+        self._write_queue.join()
+        log_path = self._path(session_id, HISTORY_LOG_SUFFIX)
+        try:
+            f = open(log_path, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        keep = line_filter or bytes.strip
+        
+        def entries():
+            with f:
+                for line in f:
+                    if keep(line):
+                        yield _json_loads(line)
+        
+        return entries()
+    
+    def _iter_history_log_reversed(
+        self,
+        session_id: str,
+        line_filter: Optional[Callable[[bytes], Any]] = None,
+        block_size: int = 65536
+    ):
+        """
+        Iterate over the entries in a session's history log, newest first.
+        
+        The log is read backwards in blocks, so taking the last few entries
+        only reads the tail of the file.
+        
+        Args:
+            session_id: ID of the session
+            line_filter: Optional predicate on raw log lines; lines it rejects aren't parsed
+            block_size: Number of bytes read per block
+        
+        Returns:
+            Generator of history entries, or None if the session has no log
+        """
+        self._write_queue.join()
+        log_path = self._path(session_id, HISTORY_LOG_SUFFIX)
+        try:
+            f = open(log_path, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        keep = line_filter or bytes.strip
+        
+        def entries():
+            with f:
+                position = f.seek(0, os.SEEK_END)
+                partial = b""
+                while position > 0:
+                    step = min(block_size, position)
+                    position -= step
+                    f.seek(position)
+                    lines = (f.read(step) + partial).split(b"\n")
+                    # The first line may continue in the previous block
+                    partial = lines[0]
+                    for line in reversed(lines[1:]):
+                        if keep(line):
+                            yield _json_loads(line)
+                if keep(partial):
+                    yield _json_loads(partial)
+        
+        return entries()
+    
+    def flush(self) -> bool:
+        """
+        Write any pending changes to the session files and wait until they are on disk.
+        
+        Returns:
+            True once all queued writes have completed
+        """
+        if self.active_session and self.session_data and self._dirty_since is not None:
+            self._save_session(self.active_session, force=True)
+        self._write_queue.join()
+        return True
+
+class AsyncSessionManager:
+    """
+    Asyncio front end for SessionManager.
+    
+    Each call runs the synchronous method in a worker thread, so database and
+    file I/O never block the event loop. Methods that change the active session
+    are serialized; read-only calls run concurrently on pooled read-only
+    connections.
+    
+    Example:
+        async with AsyncSessionManager() as sessions:
+            await sessions.create_session("refactor")
+            await sessions.add_to_history("ls", {"path": "."})
+    """
+    
+    def __init__(self, sessions_dir: Optional[str] = None, db_path: Optional[str] = None):
+        """
+        Initialize the session manager.
+        
+        Args:
+            sessions_dir: Path to the sessions directory. If None, uses the default.
+            db_path: Path to the sessions database. If None, uses the default.
+        """
+        self.manager = SessionManager(sessions_dir, db_path)
+        self._write_lock = asyncio.Lock()
+    
+    async def _read(self, func: Callable, *args, **kwargs) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    
+    async def _write(self, func: Callable, *args, **kwargs) -> Any:
+        async with self._write_lock:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    
+    async def __aenter__(self) -> "AsyncSessionManager":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Flush pending session files and close the database connection."""
+        await self._write(self.manager.close)
+    
+    async def flush(self) -> bool:
+        """Write pending changes to the session files."""
+        return await self._write(self.manager.flush)
+    
+    async def list_sessions(self) -> List[Dict[str, Any]]:
+        """List all available sessions."""
+        return await self._read(self.manager.list_sessions)
+    
+    async def load_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load session data from the database."""
+        return await self._read(self.manager.load_session_data, session_id)
+    
+    async def get_session_history(
+        self,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        command_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the command history for a session."""
+        return await self._read(self.manager.get_session_history, session_id, limit, command_filter)
+    
+    async def get_active_session(self) -> Optional[Dict[str, Any]]:
+        """Get the currently active session."""
+        return await self._write(self.manager.get_active_session)
+    
+    async def save_session_to_db(self, session_id: str, session_data: Dict[str, Any]) -> bool:
+        """Save session metadata to the database."""
+        return await self._write(self.manager.save_session_to_db, session_id, session_data)
+    
+    async def create_session(self, name: str, **kwargs) -> Dict[str, Any]:
+        """Create a new development session (see SessionManager.create_session)."""
+        return await self._write(self.manager.create_session, name, **kwargs)
+    
+    async def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load an existing session."""
+        return await self._write(self.manager.load_session, session_id)
+    
+    async def close_session(self, session_id: Optional[str] = None) -> bool:
+        """Close a session, marking it as completed."""
+        return await self._write(self.manager.close_session, session_id)
+    
+    async def add_to_history(
+        self,
+        command: str,
+        args: Optional[Dict[str, Any]] = None,
+        result: Optional[Any] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """Add a command and its result to the active session's history."""
+        return await self._write(self.manager.add_to_history, command, args, result, error)
+    
+    async def append_history(self, session_id: str, entry: Dict[str, Any]) -> bool:
+        """Append a prepared history entry to any session's history."""
+        return await self._write(self.manager.append_history, session_id, entry)
+    
+    async def set_context_value(self, key: str, value: Any) -> bool:
+        """Set a value in the session context."""
+        return await self._write(self.manager.set_context_value, key, value)
+    
+    async def set_state_variable(self, name: str, value: Any) -> bool:
+        """Set a variable in the session state."""
+        return await self._write(self.manager.set_state_variable, name, value)
+    
+    async def delete_session(self, session_id: str) -> bool:
+        """Delete a session."""
+        return await self._write(self.manager.delete_session, session_id)
 
+def _add_create_arguments(parser) -> None:
+    parser.add_argument("name", help="Session name")
+    parser.add_argument("--description", "-d", help="Session description")
+    parser.add_argument("--project-id", "-p", help="Associated project ID")
+    parser.add_argument("--tags", "-t", nargs="+", help="Session tags")
+    parser.add_argument("--id", help="Custom session ID")
 
-if __name__ == "__main__":
-    """Command-line interface for session manager."""
+def _add_load_arguments(parser) -> None:
+    parser.add_argument("id", help="Session ID")
+
+def _add_id_option(parser) -> None:
+    parser.add_argument("--id", help="Session ID (default: active session)")
+
+def _add_export_arguments(parser) -> None:
+    _add_id_option(parser)
+    parser.add_argument("--output", "-o", help="Output file path")
+
+def _add_import_arguments(parser) -> None:
+    parser.add_argument("file", nargs="+", help="Input file path(s)")
+    parser.add_argument("--id", help="Custom session ID (only with a single input file)")
+    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing session")
+
+def _add_list_arguments(parser) -> None:
+    parser.add_argument("--limit", "-l", type=int, help="Maximum number of sessions (most recently active first)")
+
+def _add_history_arguments(parser) -> None:
+    _add_id_option(parser)
+    parser.add_argument("--limit", "-l", type=int, help="Maximum number of entries")
+    parser.add_argument("--filter", "-f", help="Filter commands containing this string")
+
+# CLI commands: name -> (help, function adding the command's arguments, defaults when
+# invoked without arguments). Commands with defaults skip argparse when given no arguments.
+_COMMANDS = {
+    "list": ("List available sessions", _add_list_arguments, {"limit": None}),
+    "create": ("Create a new session", _add_create_arguments, None),
+    "load": ("Load a session", _add_load_arguments, None),
+    "active": ("Get active session", None, {}),
+    "close": ("Close a session", _add_id_option, {"id": None}),
+    "export": ("Export a session", _add_export_arguments, {"id": None, "output": None}),
+    "import": ("Import a session", _add_import_arguments, None),
+    "reset": ("Reset a session", _add_id_option, {"id": None}),
+    "delete": ("Delete a session", _add_load_arguments, None),
+    "history": ("Get session command history", _add_history_arguments, {"id": None, "limit": None, "filter": None}),
+}
+
+def _build_parser(command: Optional[str] = None):
+    """
+    Build the argument parser for one command, or for all commands if command is None.
+    
+    Only the invoked command's arguments are set up; the full parser is only
+    needed for help, usage errors and unknown commands.
+    """
     import argparse
     
+    if command is not None:
+        help_text, add_arguments, _ = _COMMANDS[command]
+        parser = argparse.ArgumentParser(prog=f"{os.path.basename(sys.argv[0])} {command}", description=help_text)
+        if add_arguments is not None:
+            add_arguments(parser)
+        return parser
+    
     parser = argparse.ArgumentParser(description="Session Manager for AI Development Agent")
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    for name, (help_text, add_arguments, _) in _COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if add_arguments is not None:
+            add_arguments(subparser)
+    return parser
+
+def _parse_args(argv: List[str]):
+    """
+    Parse command-line arguments into a namespace with a `command` attribute.
     
-    # List sessions command
-    list_parser = subparsers.add_parser("list", help="List available sessions")
-    
-    # Create session command
-    create_parser = subparsers.add_parser("create", help="Create a new session")
-    create_parser.add_argument("name", help="Session name")
-    create_parser.add_argument("--description", "-d", help="Session description")
-    create_parser.add_argument("--project-id", "-p", help="Associated project ID")
-    create_parser.add_argument("--tags", "-t", nargs="+", help="Session tags")
-    create_parser.add_argument("--id", help="Custom session ID")
-    
-    # Load session command
-    load_parser = subparsers.add_parser("load", help="Load a session")
-    load_parser.add_argument("id", help="Session ID")
-    
-    # Get active session command
-    active_parser = subparsers.add_parser("active", help="Get active session")
-    
-    # Close session command
-    close_parser = subparsers.add_parser("close", help="Close a session")
-    close_parser.add_argument("--id", help="Session ID (default: active session)")
-    
-    # Export session command
-    export_parser = subparsers.add_parser("export", help="Export a session")
-    export_parser.add_argument("--id", help="Session ID (default: active session)")
-    export_parser.add_argument("--output", "-o", help="Output file path")
-    
-    # Import session command
-    import_parser = subparsers.add_parser("import", help="Import a session")
-    import_parser.add_argument("file", help="Input file path")
-    import_parser.add_argument("--id", help="Custom session ID")
-    import_parser.add_argument("--overwrite", action="store_true", help="Overwrite existing session")
-    
-    # Reset session command
-    reset_parser = subparsers.add_parser("reset", help="Reset a session")
-    reset_parser.add_argument("--id", help="Session ID (default: active session)")
-    
-    # Delete session command
-    delete_parser = subparsers.add_parser("delete", help="Delete a session")
-    delete_parser.add_argument("id", help="Session ID")
-    
-    # Get session history command
-    history_parser = subparsers.add_parser("history", help="Get session command history")
-    history_parser.add_argument("--id", help="Session ID (default: active session)")
-    history_parser.add_argument("--limit", "-l", type=int, help="Maximum number of entries")
-    history_parser.add_argument("--filter", "-f", help="Filter commands containing this string")
-    
-    args = parser.parse_args()
-    
-    # Initialize session manager
-    session_manager = SessionManager()
-    
-    # Execute command
-    if args.command == "list":
-        sessions = session_manager.list_sessions()
-        if sessions:
-            print(f"Found {len(sessions)} sessions:")
-            for session in sessions:
-                print(f"\nID: {session.get('id', 'unknown')}")
-                print(f"Name: {session.get('name', 'unnamed')}")
-                
-                if "description" in session and session["description"]:
-                    print(f"Description: {session['description']}")
-                
-                if "project_id" in session and session["project_id"]:
-                    print(f"Project: {session['project_id']}")
-                
-                if "status" in session:
-                    print(f"Status: {session['status']}")
-                
-                if "start_time" in session:
-                    print(f"Started: {session['start_time']}")
-                
-                if "last_activity" in session:
-                    print(f"Last activity: {session['last_activity']}")
-                
-                if "duration" in session:
-                    print(f"Duration: {session['duration']}")
-        else:
-            print("No sessions found")
-    
-    elif args.command == "create":
-        session = session_manager.create_session(
-            name=args.name,
-            description=args.description,
-            project_id=args.project_id,
-            tags=args.tags,
-            session_id=args.id
-        )
-        print(f"Created session: {session.get('id')}")
-        print(f"Name: {session.get('name')}")
-        print(f"Started: {session.get('start_time')}")
+    Args:
+        argv: Arguments without the program name
+    """
+    command = argv[0] if argv else None
+    if command not in _COMMANDS:
+        return _build_parser().parse_args(argv)
     
-    elif args.command == "load":
-        session = session_manager.load_session(args.id)
-        if session:
-            print(f"Loaded session: {session.get('id')}")
-            print(f"Name: {session.get('name')}")
-            print(f"Project: {session.get('project_id', 'none')}")
-        else:
-            print(f"Failed to load session: {args.id}")
-            sys.exit(1)
-    
-    elif args.command == "active":
-        session = session_manager.get_active_session()
-        if session:
-            print(f"Active session: {session.get('id')}")
-            print(f"Name: {session.get('name')}")
-            print(f"Project: {session.get('project_id', 'none')}")
-            print(f"Started: {session.get('start_time')}")
-            print(f"Last activity: {session.get('last_activity')}")
-        else:
-            print("No active session")
+    defaults = _COMMANDS[command][2]
+    if defaults is not None and len(argv) == 1:
+        # No arguments to parse, so argparse isn't needed at all
+        return SimpleNamespace(command=command, **defaults)
     
-    elif args.command == "close":
-        session_id = args.id  # May be None, which will close the active session
-        success = session_manager.close_session(session_id)
-        if success:
-            print(f"Closed session: {session_id or 'active session'}")
-        else:
-            print(f"Failed to close session: {session_id or 'active session'}")
-            sys.exit(1)
+    args = _build_parser(command).parse_args(argv[1:])
+    args.command = command
+    return args
+
+# Optional session fields shown by the list command, in display order
+_LIST_FIELDS = (
+    ("status", "Status"),
+    ("start_time", "Started"),
+    ("last_activity", "Last activity"),
+    ("duration", "Duration"),
+)
+
+_format_arg = "{}={}".format
+
+# History entry fields shown by the history command, and their defaults when absent
+_MISSING = object()
+_HIST_KEYS = ("command", "timestamp", "args", "working_directory", "result", "error")
+_HIST_DEFAULTS = ("unknown", "unknown", None, _MISSING, _MISSING, _MISSING)
+
+# Bounded repr for history results: caps every string, number and container so a
+# large result isn't fully stringified just to show its first 100 characters
+_RESULT_REPR = reprlib.Repr()
+_RESULT_REPR.maxlevel = 6
+_RESULT_REPR.maxstring = _RESULT_REPR.maxlong = _RESULT_REPR.maxother = 100
+_RESULT_REPR.maxdict = _RESULT_REPR.maxlist = _RESULT_REPR.maxtuple = 50
+_RESULT_REPR.maxset = _RESULT_REPR.maxfrozenset = _RESULT_REPR.maxdeque = _RESULT_REPR.maxarray = 50
+
+def _truncate_result(result: Any, width: int = 100) -> str:
+    """Format a history result for display, truncated to `width` characters."""
+    text = result if isinstance(result, str) else _RESULT_REPR.repr(result)
+    if len(text) > width:
+        text = text[:width] + "..."
+    return text
+
+class _BatchedOutput:
+    """
+    Collects CLI output lines and writes them to stdout in large batches.
     
-    elif args.command == "export":
-        output_file = session_manager.export_session(args.id, args.output)
-        if output_file:
-            print(f"Exported session to: {output_file}")
-        else:
-            print("Failed to export session")
-            sys.exit(1)
-    
-    elif args.command == "import":
-        session = session_manager.import_session(args.file, args.id, args.overwrite)
-        if session:
-            print(f"Imported session: {session.get('id')}")
-            print(f"Name: {session.get('name')}")
-        else:
-            print(f"Failed to import session from: {args.file}")
-            sys.exit(1)
+    When stdout isn't a terminal (e.g. piped into grep or less), lines are
+    encoded into a byte buffer that is written with os.write, bypassing
+    TextIOWrapper's per-write encoding, locking and line-buffer flushes.
+    """
     
-    elif args.command == "reset":
-        success = session_manager.reset_session(args.id)
-        if success:
-            print(f"Reset session: {args.id or 'active session'}")
-        else:
-            print(f"Failed to reset session: {args.id or 'active session'}")
-            sys.exit(1)
+    def __init__(self, limit: int = CLI_WRITE_BATCH_BYTES):
+        self._limit = limit
+        self._encoding = sys.stdout.encoding or "utf-8"
+        self._errors = sys.stdout.errors or "strict"
+        try:
+            self._fd = None if sys.stdout.isatty() else sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            self._fd = None  # Not backed by a file descriptor (e.g. redirected to a StringIO)
+        if self._fd is not None:
+            # Anything printed earlier must come out before our raw writes
+            sys.stdout.flush()
+        self._buffer = bytearray()
+        self._lines = []
+        self._size = 0
     
-    elif args.command == "delete":
-        success = session_manager.delete_session(args.id)
-        if success:
-            print(f"Deleted session: {args.id}")
-        else:
-            print(f"Failed to delete session: {args.id}")
-            sys.exit(1)
-    
-    elif args.command == "history":
-        history = session_manager.get_session_history(args.id, args.limit, args.filter)
-        if history:
-            print(f"Session history ({len(history)} entries):")
-            for i, entry in enumerate(history):
-                print(f"\n{i+1}. {entry.get('command', 'unknown')} - {entry.get('timestamp', 'unknown')}")
-                if "args" in entry and entry["args"]:
-                    args_str = ", ".join(f"{k}={v}" for k, v in entry["args"].items())
-                    print(f"   Args: {args_str}")
-                if "working_directory" in entry:
-                    print(f"   Directory: {entry['working_directory']}")
-                if "result" in entry:
-                    result_str = str(entry["result"])
-                    if len(result_str) > 100:
-                        result_str = result_str[:100] + "..."
-                    print(f"   Result: {result_str}")
-                if "error" in entry:
-                    print(f"   Error: {entry['error']}")
+    def line(self, text: str) -> None:
+        """Add a line of output."""
+        if self._fd is not None:
+            self._buffer += text.encode(self._encoding, self._errors)
+            self._buffer += b"\n"
+            if len(self._buffer) >= self._limit:
+                self.flush()
         else:
-            print("No history found")
+            self._lines.append(text)
+            self._size += len(text) + 1
+            if self._size >= self._limit:
+                self.flush()
+    
+    def flush(self) -> None:
+        """Write all collected lines."""
+        if self._fd is not None:
+            written = 0
+            with memoryview(self._buffer) as view:
+                while written < len(view):
+                    written += os.write(self._fd, view[written:])
+            self._buffer.clear()
+        elif self._lines:
+            self._lines.append("")
+            sys.stdout.write("\n".join(self._lines))
+            self._lines.clear()
+            self._size = 0
+
+def _store_signature() -> List[Any]:
+    """Return the mtimes and sizes of the default session store's files."""
+    signature = []
+    for path in (DEFAULT_DB_PATH, DEFAULT_DB_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+            signature.append([st.st_mtime_ns, st.st_size])
+        except OSError:
+            signature.append(None)
+    return signature
+
+def _cached_cli_result(name: str, compute) -> Any:
+    """
+    Return the result of a read-only CLI command, cached on disk between invocations.
+    
+    The cached result is reused while the session store is unchanged and the
+    cache is younger than CLI_CACHE_TTL; otherwise compute() is called and the
+    cache rewritten. The store signature is taken before computing, so a write
+    that races with the computation only causes an extra miss, never a stale hit.
+    
+    Args:
+        name: Cache entry name
+        compute: Function computing the result (must be JSON-serializable)
+    """
+    cache_path = os.path.join(CLI_CACHE_DIR, name + ".json")
+    signature = _store_signature()
+    
+    try:
+        cached = _json_loads(_read_small_file(cache_path))
+        if (cached.get("signature") == signature
+                and time.time() - cached.get("created", 0) < CLI_CACHE_TTL):
+            return cached["result"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    
+    result = compute()
+    try:
+        os.makedirs(CLI_CACHE_DIR, exist_ok=True)
+        _atomic_write(cache_path, _json_dumps({
+            "signature": signature,
+            "created": time.time(),
+            "result": result
+        }), fsync=False)
+    except OSError as e:
+        logger.debug(f"Error writing CLI cache: {e}")
+    return result
+
+# The session manager is only constructed when a command needs it
+_get_session_manager = functools.lru_cache(maxsize=1)(SessionManager)
+
+def _cmd_list(args) -> None:
+    limit = args.limit
+    sessions = _cached_cli_result(
+        "list" if limit is None else f"list-{limit}",
+        lambda: _get_session_manager().list_sessions(limit)
+    )
+    if sessions:
+        # Collect lines and write them in large batches instead of printing line by line
+        output = _BatchedOutput()
+        line = output.line
+        line(f"Found {len(sessions)} sessions:")
+        for session in sessions:
+            line("")
+            line(f"ID: {session.get('id', 'unknown')}")
+            line(f"Name: {session.get('name', 'unnamed')}")
+            
+            if session.get("description"):
+                line(f"Description: {session['description']}")
+            
+            if session.get("project_id"):
+                line(f"Project: {session['project_id']}")
+            
+            for key, label in _LIST_FIELDS:
+                if key in session:
+                    line(f"{label}: {session[key]}")
+        output.flush()
+    else:
+        print("No sessions found")
+
+def _cmd_create(args) -> None:
+    session = _get_session_manager().create_session(
+        name=args.name,
+        description=args.description,
+        project_id=args.project_id,
+        tags=args.tags,
+        session_id=args.id
+    )
+    print(f"Created session: {session.get('id')}")
+    print(f"Name: {session.get('name')}")
+    print(f"Started: {session.get('start_time')}")
+
+def _cmd_load(args) -> None:
+    session = _get_session_manager().load_session(args.id)
+    if session:
+        print(f"Loaded session: {session.get('id')}")
+        print(f"Name: {session.get('name')}")
+        print(f"Project: {session.get('project_id', 'none')}")
+    else:
+        print(f"Failed to load session: {args.id}")
+        sys.exit(1)
+
+def _cmd_active(args) -> None:
+    session = _cached_cli_result("active", lambda: _get_session_manager().get_active_session())
+    if session:
+        print(f"Active session: {session.get('id')}")
+        print(f"Name: {session.get('name')}")
+        print(f"Project: {session.get('project_id', 'none')}")
+        print(f"Started: {session.get('start_time')}")
+        print(f"Last activity: {session.get('last_activity')}")
+    else:
+        print("No active session")
+
+def _cmd_close(args) -> None:
+    session_id = args.id  # May be None, which will close the active session
+    success = _get_session_manager().close_session(session_id)
+    if success:
+        print(f"Closed session: {session_id or 'active session'}")
+    else:
+        print(f"Failed to close session: {session_id or 'active session'}")
+        sys.exit(1)
+
+def _cmd_export(args) -> None:
+    output_file = _get_session_manager().export_session(args.id, args.output)
+    if output_file:
+        print(f"Exported session to: {output_file}")
+    else:
+        print("Failed to export session")
+        sys.exit(1)
+
+def _cmd_import(args) -> None:
+    if args.id and len(args.file) > 1:
+        print("--id can only be used when importing a single file")
+        sys.exit(1)
     
+    # All imports are written to the database in one transaction, so successes
+    # are only reported once it has committed
+    session_manager = _get_session_manager()
+    imported = []
+    failed = False
+    try:
+        with session_manager.batch():
+            for input_file in args.file:
+                session = session_manager.import_session(input_file, args.id, args.overwrite)
+                if session:
+                    imported.append(session)
+                else:
+                    print(f"Failed to import session from: {input_file}")
+                    failed = True
+    except RuntimeError as e:
+        print(f"Failed to import sessions: {e}")
+        sys.exit(1)
+    for session in imported:
+        print(f"Imported session: {session.get('id')}")
+        print(f"Name: {session.get('name')}")
+    if failed:
+        sys.exit(1)
+
+def _cmd_reset(args) -> None:
+    success = _get_session_manager().reset_session(args.id)
+    if success:
+        print(f"Reset session: {args.id or 'active session'}")
+    else:
+        print(f"Failed to reset session: {args.id or 'active session'}")
+        sys.exit(1)
+
+def _cmd_delete(args) -> None:
+    success = _get_session_manager().delete_session(args.id)
+    if success:
+        print(f"Deleted session: {args.id}")
+    else:
+        print(f"Failed to delete session: {args.id}")
+        sys.exit(1)
+
+def _cmd_history(args) -> None:
+    # Stream entries straight into the output instead of materializing the whole history
+    history = _get_session_manager().iter_session_history(args.id, args.limit, args.filter)
+    first = next(history, None)
+    if first is not None:
+        # Collect lines and write them in large batches instead of printing line by line;
+        # the entry count is only known at the end, so it goes in the footer
+        output = _BatchedOutput()
+        append = output.line
+        append("Session history:")
+        count = 0
+        for count, entry in enumerate(itertools.chain((first,), history), 1):
+            # One lookup per field; _MISSING tells absent fields apart from None values
+            command, timestamp, entry_args, directory, result, error = map(
+                entry.get, _HIST_KEYS, _HIST_DEFAULTS
+            )
+            append("")
+            append(f"{count}. {command} - {timestamp}")
+            if entry_args:
+                append(f"   Args: {', '.join(itertools.starmap(_format_arg, entry_args.items()))}")
+            if directory is not _MISSING:
+                append(f"   Directory: {directory}")
+            if result is not _MISSING:
+                append(f"   Result: {_truncate_result(result)}")
+            if error is not _MISSING:
+                append(f"   Error: {error}")
+        append("")
+        append(f"({count} entries)")
+        output.flush()
     else:
-        parser.print_help()
+        print("No history found")
+
+# Command handlers, keyed by command name
+_DISPATCH = {
+    "list": _cmd_list,
+    "create": _cmd_create,
+    "load": _cmd_load,
+    "active": _cmd_active,
+    "close": _cmd_close,
+    "export": _cmd_export,
+    "import": _cmd_import,
+    "reset": _cmd_reset,
+    "delete": _cmd_delete,
+    "history": _cmd_history,
+}
+
+def main():
+    """Command-line interface for session manager."""
+    args = _parse_args(sys.argv[1:])
+    
+    handler = _DISPATCH.get(args.command)
+    if handler is None:
+        _build_parser().print_help()
+        return
+    
+    handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import sys
 import time
 import logging
 import json
+import timeit
+import concurrent.futures
 from typing import Dict, List, Any, Optional
 import statistics
 
@@ -82,33 +84,85 @@ class PerformanceTester:
         # Basic tests
         self._run_test("project_creation", self.test_project_creation)
         self._run_test("session_creation", self.test_session_creation)
-        self._run_test("context_selection", self.test_context_selection)
-        self._run_test("query_analysis", self.test_query_analysis)
+        self._run_test("context_selection", self.test_context_selection, autorange=True)
+        self._run_test("query_analysis", self.test_query_analysis, autorange=True)
         
         # Save results
         self._save_results()
         
         return self.results
     
-    def _run_test(self, test_name: str, test_func, iterations: int = 5) -> None:
+    def run_all_tests_parallel(self, max_workers: int = 4) -> Dict[str, Any]:
+        """
+        Run the read-only performance tests concurrently.
+        
+        The project and session tests create and delete records (and change the
+        active session), and neither ProjectManager nor SessionManager is meant
+        to be shared across threads, so they run first, one after the other.
+        The context selection and query analysis tests only read through the
+        stateless ContextSelector and run concurrently afterwards. This shortens
+        the suite when those tests mostly wait on I/O (Qdrant, Redis, the LLM
+        backends), but their timings then include contention with each other;
+        use run_all_tests() for comparable numbers.
+        
+        Args:
+            max_workers: Maximum number of tests to run at once
+            
+        Returns:
+            Dictionary with test results
+        """
+        logger.info("Running all performance tests in parallel...")
+        
+        # Tests with side effects on shared components
+        self._run_test("project_creation", self.test_project_creation)
+        self._run_test("session_creation", self.test_session_creation)
+        
+        read_only_tests = {
+            "context_selection": self.test_context_selection,
+            "query_analysis": self.test_query_analysis,
+        }
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._run_test, name, func, autorange=True)
+                for name, func in read_only_tests.items()
+            ]
+            for future in futures:
+                future.result()
+        
+        # Save results
+        self._save_results()
+        
+        return self.results
+    
+    def _run_test(self, test_name: str, test_func, iterations: int = 5, autorange: bool = False) -> None:
         """
         Run a specific test multiple times and record results.
         
+        Durations are measured with the monotonic, high-resolution
+        perf_counter_ns clock. The minimum is the primary metric: it is the
+        run least disturbed by other activity.
+        
         Args:
             test_name: Name of the test
             test_func: Test function to run
             iterations: Number of iterations
+            autorange: Also repeat the test with timeit's autorange until the total
+                takes at least 0.2s, for a per-call time of tests too fast to time
+                individually. Only for tests without side effects, as it may run
+                them hundreds of times.
         """
         logger.info(f"Running test: {test_name} ({iterations} iterations)")
         durations = []
         
+        # Warm-up run, not measured: the first call pays for cold caches and connections
+        test_func()
+        
         for i in range(iterations):
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             result = test_func()
-            end_time = time.time()
-            duration = end_time - start_time
+            duration = (time.perf_counter_ns() - start_time) / 1e9
             durations.append(duration)
-            logger.info(f"  Iteration {i+1}/{iterations}: {duration:.4f}s")
+            logger.info(f"  Iteration {i+1}/{iterations}: {duration:.6f}s")
         
         # Calculate statistics
         self.results["tests"][test_name] = {
@@ -120,13 +174,19 @@ class PerformanceTester:
             "iterations": iterations,
             "durations": durations,
         }
+        if autorange:
+            loops, total = timeit.Timer(test_func).autorange()
+            self.results["tests"][test_name]["per_call"] = total / loops
+            self.results["tests"][test_name]["autorange_loops"] = loops
         
         # Log summary
         logger.info(f"Test completed: {test_name}")
-        logger.info(f"  Mean: {self.results['tests'][test_name]['mean']:.4f}s")
-        logger.info(f"  Median: {self.results['tests'][test_name]['median']:.4f}s")
-        logger.info(f"  Min: {self.results['tests'][test_name]['min']:.4f}s")
-        logger.info(f"  Max: {self.results['tests'][test_name]['max']:.4f}s")
+        logger.info(f"  Min: {self.results['tests'][test_name]['min']:.6f}s")
+        if autorange:
+            logger.info(f"  Per call ({loops} loops): {self.results['tests'][test_name]['per_call']:.6f}s")
+        logger.info(f"  Mean: {self.results['tests'][test_name]['mean']:.6f}s")
+        logger.info(f"  Median: {self.results['tests'][test_name]['median']:.6f}s")
+        logger.info(f"  Max: {self.results['tests'][test_name]['max']:.6f}s")
     
     def _save_results(self) -> None:
         """Save test results to a file."""
@@ -180,6 +240,7 @@ class PerformanceTester:
         
         # Close and delete the session
         self.session_manager.close_session()
+        self.session_manager.delete_session(session["id"])
         
         return {
             "session_id": session["id"],
@@ -200,17 +261,17 @@ class PerformanceTester:
         results = {}
         
         for strategy in strategies:
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             contexts = self.context_selector.select_context(
                 query=query,
                 project_id=None,
                 max_contexts=5,
                 context_strategy=strategy
             )
-            end_time = time.time()
+            duration = (time.perf_counter_ns() - start_time) / 1e9
             
             results[strategy] = {
-                "duration": end_time - start_time,
+                "duration": duration,
                 "context_count": len(contexts)
             }
         
@@ -234,12 +295,12 @@ class PerformanceTester:
         results = {}
         
         for query in queries:
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             analysis = self.context_selector.analyze_query_complexity(query)
-            end_time = time.time()
+            duration = (time.perf_counter_ns() - start_time) / 1e9
             
             results[query] = {
-                "duration": end_time - start_time,
+                "duration": duration,
                 "optimal_strategy": analysis["optimal_strategy"],
                 "structure_count": analysis["structure_count"]
             }
@@ -254,17 +315,22 @@ if __name__ == "__main__":
     try:
         # Run performance tests
         tester = PerformanceTester()
-        results = tester.run_all_tests()
+        if "--parallel" in sys.argv[1:]:
+            results = tester.run_all_tests_parallel()
+        else:
+            results = tester.run_all_tests()
         
         # Print summary
         print("\nPerformance Test Summary:")
         print("------------------------")
         for test_name, test_results in results["tests"].items():
             print(f"{test_name}:")
-            print(f"  Mean: {test_results['mean']:.4f}s")
-            print(f"  Median: {test_results['median']:.4f}s")
-            print(f"  Min: {test_results['min']:.4f}s")
-            print(f"  Max: {test_results['max']:.4f}s")
+            print(f"  Min: {test_results['min']:.6f}s")
+            if "per_call" in test_results:
+                print(f"  Per call: {test_results['per_call']:.6f}s")
+            print(f"  Mean: {test_results['mean']:.6f}s")
+            print(f"  Median: {test_results['median']:.6f}s")
+            print(f"  Max: {test_results['max']:.6f}s")
         
         print(f"\nDetailed results saved to: {tester.results_file}")
         
@@ -6,6 +6,7 @@ Test script for embedding code fragments and storing them in Qdrant.
 import os
 import sys
 import time
+import functools
 from typing import List
 
 import numpy as np
@@ -15,12 +16,16 @@ import requests
 # Import the Qdrant helper
 import qdrant_helper
 
-def get_sample_code_fragments() -> List[dict]:
-    """Return a list of sample code fragments for testing."""
-    return [
-        {
-            "filename": "sample_utils.py",
-            "code": """
+@functools.lru_cache(maxsize=1)
+def load_model(name: str = 'all-MiniLM-L6-v2') -> SentenceTransformer:
+    """Load the embedding model once per process."""
+    return SentenceTransformer(name)
+
+# Sample code fragments for testing, built once at import
+_SAMPLE_FRAGMENTS = [
+    {
+        "filename": "sample_utils.py",
+        "code": """
 def calculate_fibonacci(n: int) -> int:
     \"\"\"Calculate the nth Fibonacci number recursively.\"\"\"
     if n <= 0:
@@ -30,15 +35,15 @@ def calculate_fibonacci(n: int) -> int:
     else:
         return calculate_fibonacci(n-1) + calculate_fibonacci(n-2)
             """,
-            "metadata": {
-                "type": "function",
-                "name": "calculate_fibonacci",
-                "description": "Recursive Fibonacci calculator"
-            }
-        },
-        {
-            "filename": "data_processor.py",
-            "code": """
+        "metadata": {
+            "type": "function",
+            "name": "calculate_fibonacci",
+            "description": "Recursive Fibonacci calculator"
+        }
+    },
+    {
+        "filename": "data_processor.py",
+        "code": """
 import pandas as pd
 from typing import Dict, List, Any
 
@@ -66,15 +71,15 @@ class DataProcessor:
             "numeric_stats": self.data.describe().to_dict()
         }
             """,
-            "metadata": {
-                "type": "class",
-                "name": "DataProcessor",
-                "description": "Data processing utility class"
-            }
-        },
-        {
-            "filename": "main.py",
-            "code": """
+        "metadata": {
+            "type": "class",
+            "name": "DataProcessor",
+            "description": "Data processing utility class"
+        }
+    },
+    {
+        "filename": "main.py",
+        "code": """
 import argparse
 import logging
 from data_processor import DataProcessor
@@ -108,13 +113,17 @@ def main():
 if __name__ == "__main__":
     main()
             """,
-            "metadata": {
-                "type": "module",
-                "name": "main",
-                "description": "Main application entry point"
-            }
+        "metadata": {
+            "type": "module",
+            "name": "main",
+            "description": "Main application entry point"
         }
-    ]
+    }
+]
+
+def get_sample_code_fragments() -> List[dict]:
+    """Return the sample code fragments for testing (shared; don't mutate them)."""
+    return _SAMPLE_FRAGMENTS
 
 def test_embedding_and_storage():
     """Test embedding code fragments and storing them in Qdrant."""
@@ -132,7 +141,7 @@ def test_embedding_and_storage():
     # Load the embedding model
     print("Loading Sentence Transformer model...")
     try:
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        model = load_model()
         print(f"Model loaded with embedding dimension: {model.get_sentence_embedding_dimension()}")
     except Exception as e:
         print(f"Failed to load embedding model: {str(e)}")
@@ -146,27 +155,29 @@ def test_embedding_and_storage():
     project_id = "test-project-" + str(int(time.time()))
     print(f"Using project ID: {project_id}")
     
-    # Embed and store each fragment
-    for i, fragment in enumerate(fragments):
-        print(f"\nProcessing fragment {i+1}/{len(fragments)}...")
-        
-        # Generate embedding
-        code = fragment["code"]
-        embedding = model.encode(code, convert_to_numpy=True).tolist()
-        
-        # Store in Qdrant
-        point_id = qdrant_helper.store_code_fragment(
-            code=code,
-            embedding=embedding,
-            filename=fragment["filename"],
-            project_id=project_id,
-            metadata=fragment["metadata"]
-        )
-        
-        if point_id:
+    # Embed all fragments in one batched forward pass
+    print(f"\nEmbedding {len(fragments)} fragments...")
+    embeddings = model.encode(
+        [fragment["code"] for fragment in fragments],
+        batch_size=32,
+        show_progress_bar=False,
+        convert_to_numpy=True
+    )
+    
+    # Store them in Qdrant with a single upsert
+    point_ids = qdrant_helper.store_code_fragments(
+        [
+            {**fragment, "embedding": embedding}
+            for fragment, embedding in zip(fragments, embeddings)
+        ],
+        project_id=project_id
+    )
+    
+    if point_ids:
+        for point_id in point_ids:
             print(f"Successfully stored fragment with ID: {point_id}")
-        else:
-            print("Failed to store fragment")
+    else:
+        print("Failed to store fragments")
     
     # Test search functionality
     print("\nTesting search functionality...")
@@ -7,18 +7,99 @@ import requests
 import json
 import os
 import sys
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration
 LITELLM_HOST = os.environ.get("LITELLM_HOST", "localhost")
 LITELLM_PORT = os.environ.get("LITELLM_PORT", "8081")
 LITELLM_URL = f"http://{LITELLM_HOST}:{LITELLM_PORT}"
 
+# Redis configuration (same variables as test_litellm_redis.py)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+
+# Reuse connections across the model listing and all completion probes
+_SESSION = requests.Session()
+
+# Shared Redis connection pool for caching probe results; connects on first use
+_POOL = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    password=REDIS_PASSWORD if REDIS_PASSWORD else None,
+    db=REDIS_DB,
+    socket_timeout=5,
+    socket_connect_timeout=0.5,
+    max_connections=16
+) if redis else None
+_REDIS = redis.Redis(connection_pool=_POOL) if redis else None
+
+def _dumps(obj, indent=False):
+    """Encode obj as JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def _loads(content):
+    """Decode a JSON body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def redis_cached(key, ttl=300):
+    """
+    Cache a function's JSON-serializable result in Redis.
+    
+    Falls through to the wrapped function if Redis is unavailable, and
+    does not cache None (failed) results.
+    
+    Args:
+        key: Redis key to store the result under
+        ttl: Time to live in seconds
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _REDIS is not None:
+                try:
+                    cached = _REDIS.get(key)
+                    if cached:
+                        return _loads(cached)
+                except redis.RedisError as e:
+                    print(f"Redis cache lookup failed: {e}")
+            
+            result = func(*args, **kwargs)
+            
+            if _REDIS is not None and result is not None:
+                try:
+                    _REDIS.setex(key, ttl, _dumps(result))
+                except redis.RedisError as e:
+                    print(f"Redis cache write failed: {e}")
+            return result
+        return wrapper
+    return decorator
+
+@redis_cached(key=f"litellm:models:{LITELLM_URL}", ttl=300)
 def get_available_models():
     """Get the list of available models from LiteLLM."""
     try:
-        response = requests.get(f"{LITELLM_URL}/v1/models")
+        response = _SESSION.get(f"{LITELLM_URL}/v1/models")
         if response.status_code == 200:
-            return response.json()
+            return _loads(response.content)
         else:
             print(f"Error: Status code {response.status_code}")
             print(f"Response: {response.text}")
@@ -39,18 +120,18 @@ def test_completion(model_name):
         
         print(f"Testing completion with model: {model_name}")
         print(f"Sending request to: {LITELLM_URL}/v1/chat/completions")
-        print(f"Payload: {json.dumps(payload, indent=2)}")
+        print(f"Payload: {_dumps(payload, indent=True).decode()}")
         
-        response = requests.post(
+        response = _SESSION.post(
             f"{LITELLM_URL}/v1/chat/completions",
             headers={"Content-Type": "application/json"},
-            json=payload
+            data=_dumps(payload)
         )
         
         print(f"Status code: {response.status_code}")
         
         if response.status_code == 200:
-            result = response.json()
+            result = _loads(response.content)
             content = result["choices"][0]["message"]["content"]
             print(f"Success! Response content (first 100 chars): {content[:100]}...")
             return True
@@ -61,31 +142,42 @@ def test_completion(model_name):
         print(f"Exception: {str(e)}")
         return False
 
-if __name__ == "__main__":
+# Model names probed whether or not they show up in /v1/models
+KNOWN_MODELS = ["llama2", "codellama"]
+
+def main():
+    """List the available models and probe completions, overlapping the network calls."""
     print(f"Testing LiteLLM at {LITELLM_URL}")
     
-    # Get available models
-    print("\nGetting available models...")
-    models_data = get_available_models()
-    
-    if models_data:
-        print("\nAvailable models:")
-        for model in models_data.get("data", []):
-            model_id = model.get("id", "Unknown")
-            print(f"- {model_id}")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        # The known-model probes don't depend on the listing, so start them first
+        futures = {model: executor.submit(test_completion, model) for model in KNOWN_MODELS}
         
-        # Test the first model
-        if models_data.get("data"):
-            first_model = models_data["data"][0]["id"]
-            print(f"\nTesting completion with first available model: {first_model}")
-            test_completion(first_model)
-    else:
-        print("Failed to get available models.")
-    
-    # Also try with known model names
-    print("\nTesting with specific model names:")
-    test_models = ["llama2", "codellama"]
+        # Get available models
+        print("\nGetting available models...")
+        models_data = get_available_models()
+        
+        if models_data:
+            print("\nAvailable models:")
+            for model in models_data.get("data", []):
+                model_id = model.get("id", "Unknown")
+                print(f"- {model_id}")
+            
+            # Test the first model
+            if models_data.get("data"):
+                first_model = models_data["data"][0]["id"]
+                if first_model not in futures:
+                    print(f"\nTesting completion with first available model: {first_model}")
+                    futures[first_model] = executor.submit(test_completion, first_model)
+        else:
+            print("Failed to get available models.")
+        
+        results = {model: future.result() for model, future in futures.items()}
     
-    for model in test_models:
-        print(f"\nTesting model: {model}")
-        test_completion(model)
+    print("\nSummary:")
+    for model, ok in results.items():
+        print(f"- {model}: {'OK' if ok else 'FAILED'}")
+    return all(results.values())
+
+if __name__ == "__main__":
+    main()
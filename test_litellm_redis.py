@@ -17,6 +17,19 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 
+# One connection pool shared by all checks; connections open on first use
+_POOL = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    password=REDIS_PASSWORD if REDIS_PASSWORD else None,
+    db=REDIS_DB,
+    socket_timeout=5,
+    socket_connect_timeout=0.5,
+    max_connections=16,
+    decode_responses=True
+)
+_REDIS = redis.Redis(connection_pool=_POOL)
+
 try:
     from code_rag import CodeRAG
 except ImportError as e:
@@ -26,59 +39,60 @@ except ImportError as e:
 class RedisModelInfoCache:
     """Basic class to check model info stored in Redis"""
     
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
-            db=REDIS_DB,
-            socket_timeout=5
-        )
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client or _REDIS
     
     def get_all_models(self):
         """Get all model info stored in Redis cache"""
         try:
-            # Get all keys that match the litellm model pattern
-            keys = self.redis_client.keys("litellm:model:*")
+            # Get all keys that match the litellm model pattern; SCAN pages through
+            # the keyspace instead of blocking Redis like KEYS does
+            keys = list(self.redis_client.scan_iter(match="litellm:model:*", count=500))
             
-            # Convert bytes to strings
-            keys = [key.decode('utf-8') if isinstance(key, bytes) else key for key in keys]
+            # Fetch every hash in one round trip instead of one HGETALL per key
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
             
             models = {}
-            for key in keys:
-                model_name = key.split(":")[-1]
-                model_data = self.redis_client.hgetall(key)
+            for key, model_data in zip(keys, pipe.execute()):
+                _, _, model_name = key.rpartition(":")
                 
-                # Convert bytes to strings
-                model_info = {}
-                for field, value in model_data.items():
-                    field = field.decode('utf-8') if isinstance(field, bytes) else field
-                    value = value.decode('utf-8') if isinstance(value, bytes) else value
-                    
-                    # Convert numeric values
-                    if field == "max_tokens" and value.isdigit():
-                        value = int(value)
-                    
-                    model_info[field] = value
+                # Convert numeric values; the client already decodes everything to str
+                max_tokens = model_data.get("max_tokens")
+                if max_tokens is not None and max_tokens.isdigit():
+                    model_data["max_tokens"] = int(max_tokens)
                 
-                models[model_name] = model_info
+                models[model_name] = model_data
             
             return models
         except Exception as e:
             print(f"Error getting models from Redis: {e}")
             return {}
+    
+    def bulk_populate(self, models):
+        """
+        Store model info for many models in one pipelined round trip.
+        
+        Args:
+            models: Mapping of model name to a dict of model info fields
+            
+        Returns:
+            Number of models written, or 0 on error
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for model_name, info in models.items():
+                pipe.hset(f"litellm:model:{model_name}", mapping=info)
+            pipe.execute()
+            return len(models)
+        except Exception as e:
+            print(f"Error populating models in Redis: {e}")
+            return 0
 
-def check_redis_connection():
+def check_redis_connection(r=_REDIS):
     """Check if Redis is accessible."""
     try:
-        r = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
-            db=REDIS_DB,
-            socket_timeout=5
-        )
-        
         # Test connection
         r.ping()
         print(f"✅ Connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
@@ -87,9 +101,9 @@ def check_redis_connection():
         print(f"❌ Failed to connect to Redis: {e}")
         return False
 
-def check_redis_cache():
+def check_redis_cache(r=_REDIS):
     """Check if the Redis cache has been created and populated."""
-    cache = RedisModelInfoCache()
+    cache = RedisModelInfoCache(r)
     models = cache.get_all_models()
     
     print(f"\nFound {len(models)} models in Redis cache:")
@@ -120,33 +134,37 @@ def test_code_rag_initialization():
     
     return second_init_time < first_init_time or second_init_time < 0.5
 
-def check_redis_keys():
+# Size command and unit for each Redis key type reported by check_redis_keys
+SIZE_CMDS = {
+    "hash": ("hlen", "fields"),
+    "set": ("scard", "members"),
+    "zset": ("zcard", "members"),
+    "list": ("llen", "items"),
+    "string": ("strlen", "bytes"),
+}
+
+def check_redis_keys(r=_REDIS):
     """Check Redis keys related to LiteLLM caching."""
     try:
-        r = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
-            db=REDIS_DB,
-            socket_timeout=5
-        )
+        # Get all keys matching litellm:*, without blocking Redis (see get_all_models)
+        keys = list(r.scan_iter(match="litellm:*", count=500))
         
-        # Get all keys matching litellm:*
-        keys = r.keys("litellm:*")
+        # Probe all key types in one round trip, then all sizes in a second one
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+        key_types = pipe.execute()
         
-        # Convert bytes to strings
-        keys = [key.decode('utf-8') if isinstance(key, bytes) else key for key in keys]
+        pipe = r.pipeline(transaction=False)
+        for key, key_type in zip(keys, key_types):
+            if key_type in SIZE_CMDS:
+                getattr(pipe, SIZE_CMDS[key_type][0])(key)
+        sizes = iter(pipe.execute())
         
         print(f"\nFound {len(keys)} LiteLLM-related keys in Redis:")
-        for key in keys:
-            key_type = r.type(key).decode('utf-8')
-            
-            if key_type == "hash":
-                size = r.hlen(key)
-                print(f"  - {key}: {key_type} with {size} fields")
-            elif key_type == "set":
-                size = r.scard(key)
-                print(f"  - {key}: {key_type} with {size} members")
+        for key, key_type in zip(keys, key_types):
+            if key_type in SIZE_CMDS:
+                print(f"  - {key}: {key_type} with {next(sizes)} {SIZE_CMDS[key_type][1]}")
             else:
                 print(f"  - {key}: {key_type}")
         
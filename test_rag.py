@@ -11,14 +11,15 @@ import time
 import uuid
 from typing import List, Dict, Any
 
-from code_rag import CodeRAG
+from qdrant_client import models
 
-def get_sample_code_fragments() -> List[Dict[str, Any]]:
-    """Return a list of sample code fragments for testing."""
-    return [
-        {
-            "filename": "data_loader.py",
-            "code": """
+from code_rag import CodeRAG, CODE_COLLECTION
+
+# Sample code fragments for testing, built once at import
+_SAMPLE_FRAGMENTS = [
+    {
+        "filename": "data_loader.py",
+        "code": """
 class DataLoader:
     \"\"\"Load data from various sources into standardized formats.\"\"\"
     
@@ -57,15 +58,15 @@ class DataLoader:
         else:
             raise ValueError(f"Unsupported source type: {source_type}")
             """,
-            "metadata": {
-                "type": "class",
-                "name": "DataLoader",
-                "description": "Utility for loading data from various sources"
-            }
-        },
-        {
-            "filename": "data_processor.py",
-            "code": """
+        "metadata": {
+            "type": "class",
+            "name": "DataLoader",
+            "description": "Utility for loading data from various sources"
+        }
+    },
+    {
+        "filename": "data_processor.py",
+        "code": """
 class DataProcessor:
     \"\"\"Process and transform data for analysis and modeling.\"\"\"
     
@@ -143,15 +144,15 @@ class DataProcessor:
         
         return data_copy
             """,
-            "metadata": {
-                "type": "class",
-                "name": "DataProcessor",
-                "description": "Utility for processing and transforming data"
-            }
-        },
-        {
-            "filename": "model_trainer.py",
-            "code": """
+        "metadata": {
+            "type": "class",
+            "name": "DataProcessor",
+            "description": "Utility for processing and transforming data"
+        }
+    },
+    {
+        "filename": "model_trainer.py",
+        "code": """
 class ModelTrainer:
     \"\"\"Train machine learning models on processed data.\"\"\"
     
@@ -212,13 +213,17 @@ class ModelTrainer:
             'r2': r2
         }
             """,
-            "metadata": {
-                "type": "class",
-                "name": "ModelTrainer",
-                "description": "Utility for training machine learning models"
-            }
+        "metadata": {
+            "type": "class",
+            "name": "ModelTrainer",
+            "description": "Utility for training machine learning models"
         }
-    ]
+    }
+]
+
+def get_sample_code_fragments() -> List[Dict[str, Any]]:
+    """Return the sample code fragments for testing (shared; don't mutate them)."""
+    return _SAMPLE_FRAGMENTS
 
 def test_code_rag():
     """Test the CodeRAG system."""
@@ -235,22 +240,38 @@ def test_code_rag():
     fragments = get_sample_code_fragments()
     print(f"Adding {len(fragments)} sample code fragments to the index...")
     
-    for i, fragment in enumerate(fragments):
-        print(f"\nProcessing fragment {i+1}/{len(fragments)}...")
-        
-        code = fragment["code"]
-        metadata = {
-            "filename": fragment["filename"],
-            "project_id": project_id,
-            **fragment["metadata"]
+    items = [
+        {
+            "code": fragment["code"],
+            "metadata": {
+                "filename": fragment["filename"],
+                "project_id": project_id,
+                **fragment["metadata"]
+            }
         }
-        
-        doc_id = rag.add_code_to_index(code, metadata)
-        print(f"Added fragment with ID: {doc_id}")
+        for fragment in fragments
+    ]
+    
+    doc_ids = rag.add_code_batch(items)
+    for fragment, doc_id in zip(fragments, doc_ids):
+        print(f"Added {fragment['filename']} with ID: {doc_id}")
     
-    # Let's give Qdrant a moment to index
+    # Wait (up to 2 seconds) until Qdrant reports the project's points
     print("\nWaiting for indexing to complete...")
-    time.sleep(2)
+    project_filter = models.Filter(
+        must=[models.FieldCondition(key="project_id", match=models.MatchValue(value=project_id))]
+    )
+    for _ in range(40):
+        indexed = rag.qdrant_client.count(
+            collection_name=CODE_COLLECTION,
+            count_filter=project_filter,
+            exact=True
+        ).count
+        if indexed >= len(fragments):
+            break
+        time.sleep(0.05)
+    else:
+        print(f"Warning: only {indexed} points indexed after waiting")
     
     # Test search functionality
     print("\nTesting search functionality...")
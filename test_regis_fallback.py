@@ -21,11 +21,19 @@ def print_colored(color, message):
     """Print a message in color."""
     print(f"{color}{message}{NC}")
 
+# Modules already imported successfully by test_module_import
+_TESTED = set()
+
 def test_module_import(module_name):
     """Test if a module can be imported and handle errors gracefully."""
     print_colored(YELLOW, f"Testing import of {module_name}...")
+    if module_name in _TESTED or module_name in sys.modules:
+        _TESTED.add(module_name)
+        print_colored(GREEN, f"✓ {module_name} is already imported")
+        return True
     try:
-        module = __import__(module_name)
+        importlib.import_module(module_name)
+        _TESTED.add(module_name)
         print_colored(GREEN, f"✓ Successfully imported {module_name}")
         return True
     except ImportError:
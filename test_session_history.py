@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for session history persistence.
+Checks that history entries written by several session managers sharing one
+database are all kept. Needs no running services; uses a temporary directory.
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from session_manager import SessionManager
+
+logging.getLogger("session_manager").setLevel(logging.WARNING)
+
+def _commands(manager, session_id):
+    """Return the commands in a session's stored history, in order."""
+    return [entry["command"] for entry in manager.get_session_history(session_id)]
+
+def _managers():
+    """Create two managers on a shared temporary sessions directory and database."""
+    tmp_dir = tempfile.mkdtemp()
+    sessions_dir = os.path.join(tmp_dir, "sessions")
+    db_path = os.path.join(tmp_dir, "sessions.db")
+    return tmp_dir, SessionManager(sessions_dir, db_path), SessionManager(sessions_dir, db_path)
+
+def test_interleaved_appends():
+    """Entries added by the active manager survive appends by another manager in between."""
+    tmp_dir, a, b = _managers()
+    try:
+        session_id = a.create_session("interleaved")["id"]
+        a.add_to_history("cmd-a0")
+        b.append_history(session_id, {"command": "cmd-b1", "timestamp": "2024-01-01T00:00:00", "args": {}})
+        a.add_to_history("cmd-a1")
+        a.add_to_history("cmd-a2")
+        a.flush()
+
+        expected = ["cmd-a0", "cmd-b1", "cmd-a1", "cmd-a2"]
+        assert _commands(b, session_id) == expected, _commands(b, session_id)
+    finally:
+        a.close()
+        b.close()
+        shutil.rmtree(tmp_dir)
+
+def test_append_before_first_save():
+    """An append by another manager right after loading doesn't hide the next local entry."""
+    tmp_dir, a, b = _managers()
+    try:
+        session_id = a.create_session("loaded")["id"]
+        a.add_to_history("cmd-a0")
+        a.flush()
+
+        # A fresh manager loads the active session, then another manager appends
+        c = SessionManager(a.sessions_dir, a.db_path)
+        b.append_history(session_id, {"command": "cmd-b1", "timestamp": "2024-01-01T00:00:00", "args": {}})
+        c.add_to_history("cmd-c1")
+        c.flush()
+        c.close()
+
+        expected = ["cmd-a0", "cmd-b1", "cmd-c1"]
+        assert _commands(b, session_id) == expected, _commands(b, session_id)
+    finally:
+        a.close()
+        b.close()
+        shutil.rmtree(tmp_dir)
+
+def main():
+    """Run all tests and report the results."""
+    tests = [test_interleaved_appends, test_append_before_first_save]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)